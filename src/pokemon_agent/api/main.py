@@ -3,18 +3,23 @@ Pokemon Agent FastAPI 应用
 实时网络检索与对战型宝可梦Multi-Agent系统API
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 import os
 import logging
 from datetime import datetime
 
+import aiohttp
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import uvicorn
 
 from ..core.tools import PokemonInfoTool, PokemonReactTool
+from ..core.services.mcp_client.pokemon_mcp_tool import PokemonMcpTool
 
 
 # 配置日志
@@ -36,6 +41,16 @@ class PokemonRequest(BaseModel):
     )
 
 
+class PokemonBatchRequest(BaseModel):
+    """宝可梦批量查询请求"""
+    pokemon_names: list[str] = Field(
+        description="宝可梦名称列表（支持中文或英文）",
+        example=["Pikachu", "Charizard"],
+        min_length=1,
+        max_length=10
+    )
+
+
 class PokemonInfoResponse(BaseModel):
     """PokemonInfoTool响应"""
     pokemon_name: str
@@ -66,25 +81,44 @@ class ErrorResponse(BaseModel):
 pokemon_info_tool: PokemonInfoTool | None = None
 pokemon_react_tool: PokemonReactTool | None = None
 
+# 同步工具调用的有界线程池：限制并发线程数，避免负载尖峰下线程无限增长
+sync_tool_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sync-tool")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     global pokemon_info_tool, pokemon_react_tool
 
+    # 共享HTTP会话：连接池+DNS缓存，向权威站点保持热连接
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300)
+    )
+    logger.info("共享 HTTP 会话初始化完成")
+
     # 启动时初始化工具
     logger.info("正在初始化 PokemonInfoTool...")
-    pokemon_info_tool = PokemonInfoTool()
+    pokemon_info_tool = PokemonInfoTool(http_session=app.state.http)
     logger.info("PokemonInfoTool 初始化完成")
 
     logger.info("正在初始化 PokemonReactTool...")
     pokemon_react_tool = PokemonReactTool()
     logger.info("PokemonReactTool 初始化完成")
 
+    # 建立长生命周期的MCP会话，避免每次调用重新spawn子进程
+    app.state.mcp = PokemonMcpTool()
+    try:
+        await app.state.mcp.start()
+        logger.info("MCP 持久会话初始化完成")
+    except Exception as e:
+        logger.warning(f"MCP 持久会话初始化失败，将按需回退: {e}")
+
     yield
 
     # 关闭时清理资源
     logger.info("正在关闭应用...")
+    await app.state.mcp.aclose()
+    await app.state.http.close()
 
 
 # 创建 FastAPI 应用
@@ -170,8 +204,8 @@ async def get_pokemon_info(request: PokemonRequest) -> PokemonInfoResponse:
 
         logger.info(f"开始获取宝可梦信息: {request.pokemon_name}")
 
-        # 调用工具
-        result = pokemon_info_tool.run(request.pokemon_name)
+        # 异步调用工具，网络I/O期间释放事件循环以服务其他请求
+        result = await pokemon_info_tool.arun(request.pokemon_name)
 
         # 检查是否有错误
         if "error" in result and result["error"]:
@@ -199,6 +233,91 @@ async def get_pokemon_info(request: PokemonRequest) -> PokemonInfoResponse:
         )
 
 
+@app.post(
+    "/api/v1/pokemon/info/stream",
+    tags=["pokemon"],
+    summary="流式获取宝可梦信息（直接模式）",
+    description="""
+    使用 PokemonInfoTool 流式检索宝可梦信息
+
+    以NDJSON形式逐行返回：首行为来源元数据，随后是随LLM输出
+    逐步完整的data对象，客户端可在首个字段到达时开始渲染
+    """,
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    }
+)
+async def get_pokemon_info_stream(request: PokemonRequest) -> StreamingResponse:
+    """流式检索宝可梦信息（NDJSON）"""
+    if not pokemon_info_tool:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="PokemonInfoTool 未初始化"
+        )
+
+    logger.info(f"开始流式获取宝可梦信息: {request.pokemon_name}")
+    return StreamingResponse(
+        pokemon_info_tool.astream_info(request.pokemon_name),
+        media_type="application/x-ndjson"
+    )
+
+
+@app.post(
+    "/api/v1/pokemon/info/batch",
+    tags=["pokemon"],
+    summary="批量获取宝可梦信息（直接模式）",
+    description="""
+    使用 PokemonInfoTool 并发检索多个宝可梦信息
+
+    所有宝可梦的检索通过 asyncio.gather 并发执行，
+    批量延迟接近单个查询的最大耗时而非总和
+    """,
+    response_model=list[PokemonInfoResponse],
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    }
+)
+async def get_pokemon_info_batch(request: PokemonBatchRequest) -> list[PokemonInfoResponse]:
+    """并发批量检索宝可梦信息"""
+    try:
+        if not pokemon_info_tool:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="PokemonInfoTool 未初始化"
+            )
+
+        logger.info(f"开始批量获取宝可梦信息: {request.pokemon_names}")
+
+        results = await pokemon_info_tool.arun_many(request.pokemon_names)
+
+        responses = []
+        for name, result in zip(request.pokemon_names, results):
+            if "error" in result and result["error"]:
+                # 批量模式下单个失败不中断整体，以错误字段返回
+                responses.append(PokemonInfoResponse(
+                    pokemon_name=name,
+                    source_url="",
+                    extraction_timestamp="",
+                    data={},
+                    error=result["error"]
+                ))
+            else:
+                responses.append(PokemonInfoResponse(**result))
+
+        return responses
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"批量获取宝可梦信息失败: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 @app.post(
     "/api/v1/pokemon/react-info",
     tags=["agent"],
@@ -234,8 +353,11 @@ async def get_pokemon_info_react(request: PokemonRequest) -> PokemonReactRespons
 
         logger.info(f"开始ReAct模式获取宝可梦信息: {request.pokemon_name}")
 
-        # 调用工具
-        result = pokemon_react_tool.run(request.pokemon_name)
+        # 同步工具调用放入有界线程池，避免阻塞事件循环
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            sync_tool_executor, pokemon_react_tool.run, request.pokemon_name
+        )
 
         # 检查是否有错误
         if not result.get("success", False):
@@ -289,11 +411,16 @@ def main():
         return
 
     # 启动服务
+    # uvloop事件循环约为asyncio的2倍，httptools解析器约为h11的5倍；
+    # worker数可通过WEB_CONCURRENCY覆盖，默认为CPU核数
     logger.info("启动 Pokemon Agent API 服务...")
     uvicorn.run(
         "src.pokemon_agent.api.main:app",
         host="0.0.0.0",
         port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
         reload=False,
         log_level="info"
     )
@@ -6,6 +6,7 @@ import json
 import logging
 import asyncio
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 
 
 # 配置日志
@@ -39,26 +40,66 @@ class PokemonMcpTool:
     def __init__(self):
         self.client = client
         self.tools = None
+        # 按名称索引的工具表，O(1)查找
+        self._tools_by_name = {}
+        # 防止并发调用各自重复拉取工具列表
+        self._tools_lock = asyncio.Lock()
+        # 长生命周期的MCP会话，避免每次调用重新spawn stdio子进程
+        self._session_cm = None
+        self._session = None
+
+    async def start(self):
+        """启动长生命周期的MCP会话（通常在FastAPI lifespan中调用）
+
+        通过持久会话加载的工具直接复用已有的stdio子进程，
+        消除每次工具调用的进程冷启动和IPC建立开销。
+        """
+        if self._session is not None:
+            return
+
+        async with self._tools_lock:
+            if self._session is not None:
+                return
+            self._session_cm = self.client.session("math")
+            self._session = await self._session_cm.__aenter__()
+            tools = await load_mcp_tools(self._session)
+            self._tools_by_name = {t.name: t for t in tools}
+            self.tools = tools
+            logger.info(f"MCP持久会话已建立，加载了 {len(tools)} 个工具")
+
+    async def aclose(self):
+        """关闭持久MCP会话"""
+        if self._session_cm is not None:
+            try:
+                await self._session_cm.__aexit__(None, None, None)
+            except Exception as e:
+                logger.warning(f"关闭MCP会话时出错: {e}")
+            finally:
+                self._session_cm = None
+                self._session = None
 
     async def get_available_tools(self):
-        """获取可用工具列表"""
+        """获取可用工具列表（带锁的一次性加载）
+
+        如果已通过start()建立持久会话，直接返回会话内加载的工具；
+        否则退回到每次调用独立建立会话的旧行为。
+        """
         if self.tools is None:
-            self.tools = await self.client.get_tools()
+            async with self._tools_lock:
+                # 双重检查：等锁期间可能已被其他协程加载
+                if self.tools is None:
+                    tools = await self.client.get_tools()
+                    self._tools_by_name = {t.name: t for t in tools}
+                    self.tools = tools
         return self.tools
 
     async def direct_tool_call(self, tool_name, **kwargs):
         """直接调用指定工具"""
         try:
-            if self.tools is None:
-                await self.get_available_tools()
-
-            # 查找对应的工具
-            tool = None
-            for t in self.tools:
-                if t.name == tool_name:
-                    tool = t
-                    break
+            await self.get_available_tools()
 
+            # O(1)查找对应的工具
+            tool = self._tools_by_name.get(tool_name)
             if tool is None:
                 return {"error": f"Tool {tool_name} not found"}
 
@@ -72,16 +113,10 @@ class PokemonMcpTool:
     async def get_pokemon_info(self, pokemon_name: str):
         """查询宝可梦信息，使用MCP工具"""
         try:
-            if self.tools is None:
-                await self.get_available_tools()
-
-            # 查找get_pokemon_info工具
-            tool = None
-            for t in self.tools:
-                if t.name == "get_pokemon_info":
-                    tool = t
-                    break
+            await self.get_available_tools()
 
+            # O(1)查找get_pokemon_info工具
+            tool = self._tools_by_name.get("get_pokemon_info")
             if tool is None:
                 return {"error": "get_pokemon_info tool not found"}
 
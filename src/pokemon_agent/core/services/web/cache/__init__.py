@@ -5,5 +5,6 @@ Web缓存模块
 """
 
 from .web_cache import WebCache
+from .extraction_cache import ExtractionCache
 
-__all__ = ['WebCache']
+__all__ = ['WebCache', 'ExtractionCache']
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+LLM提取结果缓存类
+按(宝可梦名称, 页面内容哈希)缓存LLM提取输出，页面未变化时跳过昂贵的LLM调用
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import xxhash
+
+try:
+    # SQLite持久层：LLM提取结果跨进程/跨重启共享，
+    # 不可用时自动退化为纯内存缓存
+    import diskcache
+except ImportError:
+    diskcache = None
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    LLM提取结果缓存
+
+    功能：
+    - 按(宝可梦名称, 内容哈希)键缓存提取结果
+    - O(1) LRU淘汰
+    - TTL过期控制
+    - 命中统计
+
+    LLM调用延迟在整个流水线中占绝对主导，页面字节未变化时
+    直接返回缓存结果可以把重复查询从秒级降到亚毫秒级。
+    """
+
+    def __init__(self, max_size: int = 256, expire_days: int = 7,
+                 disk_path: str = "/var/tmp/pokemon_extraction_cache"):
+        """
+        初始化提取结果缓存
+
+        Args:
+            max_size: 最大缓存数量
+            expire_days: 缓存过期天数
+            disk_path: 磁盘缓存目录，None禁用磁盘层
+        """
+        self.max_size = max_size
+        self.expire_seconds = expire_days * 86400
+
+        # LRU顺序的 (插入时间戳, 提取结果)
+        self.cache_data: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+
+        # 磁盘持久层（L2）：temperature=0下LLM输出确定，结果可以
+        # 安全地跨uvicorn worker和重启复用；每个工作进程各持有的
+        # 内存L1未命中时回落到共享SQLite
+        self.disk_cache = None
+        if diskcache is not None and disk_path:
+            try:
+                self.disk_cache = diskcache.Cache(disk_path, size_limit=int(1e9))
+            except Exception as e:
+                logger.warning(f"磁盘缓存初始化失败，仅使用内存缓存: {e}")
+
+        # 缓存统计
+        self.stats = {
+            "hits": 0,
+            "misses": 0
+        }
+
+        disk_state = "启用" if self.disk_cache is not None else "禁用"
+        logger.info(f"ExtractionCache初始化完成，最大缓存: {max_size}, "
+                    f"过期时间: {expire_days}天, 磁盘层: {disk_state}")
+
+    @staticmethod
+    def make_key(pokemon_name: str, content: str) -> Tuple[str, str]:
+        """
+        生成缓存键
+
+        Args:
+            pokemon_name: 宝可梦名称
+            content: 页面内容
+
+        Returns:
+            (规范化名称, 内容哈希) 元组
+        """
+        return (pokemon_name.strip().lower(), xxhash.xxh3_64_hexdigest(content.encode()))
+
+    def get(self, pokemon_name: str, content: str) -> Optional[Any]:
+        """
+        获取缓存的提取结果
+
+        Args:
+            pokemon_name: 宝可梦名称
+            content: 页面内容
+
+        Returns:
+            缓存的提取结果或None
+        """
+        key = self.make_key(pokemon_name, content)
+        entry = self.cache_data.get(key)
+
+        if entry is not None and time.time() - entry[0] < self.expire_seconds:
+            self.stats["hits"] += 1
+            self.cache_data.move_to_end(key)
+            logger.info(f"提取结果缓存命中: {pokemon_name}")
+            return entry[1]
+
+        # 过期条目顺手删除
+        if entry is not None:
+            del self.cache_data[key]
+
+        # L1未命中时查磁盘层（其他进程或上次运行的结果）
+        if self.disk_cache is not None:
+            try:
+                disk_result = self.disk_cache.get(key)
+            except Exception as e:
+                logger.warning(f"磁盘缓存读取失败: {e}")
+                disk_result = None
+            if disk_result is not None:
+                self.stats["hits"] += 1
+                # 回填L1，后续命中无需再碰SQLite
+                self.cache_data[key] = (time.time(), disk_result)
+                while len(self.cache_data) > self.max_size:
+                    self.cache_data.popitem(last=False)
+                logger.info(f"提取结果磁盘缓存命中: {pokemon_name}")
+                return disk_result
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, pokemon_name: str, content: str, result: Any):
+        """
+        缓存提取结果
+
+        Args:
+            pokemon_name: 宝可梦名称
+            content: 页面内容
+            result: LLM提取结果
+        """
+        key = self.make_key(pokemon_name, content)
+
+        self.cache_data[key] = (time.time(), result)
+        self.cache_data.move_to_end(key)
+        while len(self.cache_data) > self.max_size:
+            self.cache_data.popitem(last=False)
+
+        # 直写磁盘层，带与内存层一致的TTL
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(key, result, expire=self.expire_seconds)
+            except Exception as e:
+                logger.warning(f"磁盘缓存写入失败: {e}")
+
+        logger.info(f"提取结果已缓存: {pokemon_name}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            统计信息字典
+        """
+        total = self.stats["hits"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] / total * 100) if total else 0.0
+        return {
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": round(hit_rate, 2),
+            "cache_size": len(self.cache_data)
+        }
+
+    def clear(self):
+        """
+        清空所有缓存
+        """
+        self.cache_data.clear()
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.clear()
+            except Exception as e:
+                logger.warning(f"磁盘缓存清空失败: {e}")
+        logger.info("提取结果缓存已清空")
@@ -5,10 +5,19 @@ Web缓存管理类
 """
 
 import json
+import re
 import time
-import hashlib
 import logging
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional, List, Tuple
+from urllib.parse import unquote
+
+import xxhash
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 
 logger = logging.getLogger(__name__)
 
@@ -24,138 +33,216 @@ class WebCache:
     - 缓存存取操作
     """
 
-    def __init__(self, max_size: int = 100, expire_days: int = 1):
+    def __init__(self, max_size: int = 100, expire_days: int = 1,
+                 disk_path: Optional[str] = "/var/tmp/pokemon_webcache"):
         """
         初始化缓存
 
         Args:
             max_size: 最大缓存数量
             expire_days: 缓存过期天数
+            disk_path: 磁盘缓存目录，None表示禁用磁盘层
         """
         self.max_size = max_size
         self.expire_days = expire_days
+        self.expire_seconds = expire_days * 86400
 
-        # 缓存统计
-        self.stats = {
-            "hits": 0,
-            "misses": 0,
-            "total_requests": 0
-        }
+        # 缓存统计：普通int属性自增比dict键自增少一次哈希查找；
+        # 总请求数恒等于hits+misses，在get_stats中推导，不单独维护
+        self.hits = 0
+        self.misses = 0
+
+        # 缓存数据存储：LRU顺序的 (插入时间戳, 数据)
+        self.cache_data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
 
-        # 缓存数据存储
-        self.cache_data: Dict[str, str] = {}
+        # 第二层索引：规范化宝可梦名称 -> 缓存键
+        # 同一宝可梦的不同URL（如Bulbapedia和52poke）可以互相命中
+        self.name_index: Dict[str, Hashable] = {}
 
-        logger.info(f"WebCache初始化完成，最大缓存: {max_size}, 过期时间: {expire_days}天")
+        # 磁盘缓存层：进程重启后保留热数据，多worker共享（diskcache内部用SQLite加锁）
+        self.disk_cache = None
+        if diskcache is not None and disk_path:
+            try:
+                self.disk_cache = diskcache.Cache(disk_path, size_limit=int(1e9))
+            except Exception as e:
+                # 目录不可写等情况下退化为纯内存缓存
+                logger.warning(f"磁盘缓存初始化失败，仅使用内存缓存: {e}")
 
-    def _generate_cache_key(self, url: str) -> str:
+        logger.info(f"WebCache初始化完成，最大缓存: {max_size}, 过期时间: {expire_days}天, "
+                    f"磁盘层: {'启用' if self.disk_cache is not None else '禁用'}")
+
+    # 短于该长度的URL直接作为字典键，不做显式哈希
+    SHORT_URL_LIMIT = 200
+
+    def _generate_cache_key(self, url: str) -> Hashable:
         """
         生成缓存键
 
+        过期完全由条目时间戳的TTL比较处理，不再把日期烘焙进键里，
+        因此键跨天保持稳定，缓存不会在每个午夜冷启动。
+
         Args:
             url: 目标URL
 
         Returns:
-            缓存键字符串
+            缓存键（短URL为其自身，长URL为xxhash摘要）
         """
-        # 基于URL和日期生成缓存键
-        expire_date = time.strftime("%Y-%m-%d", time.time() - (self.expire_days * 86400))
-        combined = f"{url}_{expire_date}"
-        return hashlib.md5(combined.encode()).hexdigest()
+        if len(url) <= self.SHORT_URL_LIMIT:
+            # 短URL直接作键，dict内置的字符串哈希比显式摘要更快
+            return url
+        # 超长URL用xxh3压缩成定长键，避免字典持有大字符串
+        return xxhash.xxh3_64_hexdigest(url.encode())
 
-    def _is_cache_valid(self, cache_key: str) -> bool:
+    # 匹配百科URL最后一段路径中的词条名，如 .../wiki/Pikachu_(Pok%C3%A9mon)
+    _URL_NAME_PATTERN = re.compile(r'/(?:wiki|pokedex(?:-\w+)?)/([^/?#]+)')
+
+    @staticmethod
+    def _normalize_name(name: str) -> str:
         """
-        检查缓存是否有效
+        规范化宝可梦名称，用作第二层索引键
 
         Args:
-            cache_key: 缓存键
+            name: 原始名称或URL词条名
 
         Returns:
-            是否有效
+            规范化后的名称
         """
-        # 检查缓存是否存在
-        if cache_key not in self.cache_data:
-            return False
+        name = unquote(name).strip().lower()
+        # 去掉百科词条的消歧后缀，如 "pikachu_(pokémon)" / "皮卡丘（宝可梦）"
+        name = re.sub(r'[_\s]*[(（][^)）]*[)）]\s*$', '', name)
+        # 统一分隔符
+        return re.sub(r'[_\s\-]+', '', name)
 
-        # 基于日期检查缓存是否过期
-        current_date = time.strftime("%Y-%m-%d")
-        cache_date = time.strftime("%Y-%m-%d", time.time() - (self.expire_days * 86400))
+    def _name_from_url(self, url: str) -> Optional[str]:
+        """
+        从百科URL中提取规范化的宝可梦名称
 
-        # 如果缓存键中的日期早于过期日期，则缓存无效
-        return cache_date >= current_date
+        Args:
+            url: 目标URL
 
-    def _cleanup_cache(self):
+        Returns:
+            规范化名称或None
         """
-        清理过期缓存和超出大小的缓存
+        match = self._URL_NAME_PATTERN.search(url)
+        if not match:
+            return None
+        normalized = self._normalize_name(match.group(1))
+        return normalized or None
+
+    def _is_entry_valid(self, entry: Tuple[float, Any]) -> bool:
         """
-        # 清理过期缓存
-        expired_keys = []
-        for key in self.cache_data.keys():
-            if not self._is_cache_valid(key):
-                expired_keys.append(key)
-
-        for key in expired_keys:
-            del self.cache_data[key]
-
-        # 如果仍然超过大小限制，删除最旧的条目
-        if len(self.cache_data) > self.max_size:
-            # 简单的LRU：删除字典的前20%个条目
-            keys_to_remove = list(self.cache_data.keys())[:int(self.max_size * 0.2)]
-            for key in keys_to_remove:
-                del self.cache_data[key]
-
-        if expired_keys or len(self.cache_data) > self.max_size:
-            logger.info(f"缓存清理完成，删除了 {len(expired_keys)} 个过期条目")
-
-    def get(self, url: str) -> Optional[str]:
+        检查缓存条目是否在TTL有效期内
+
+        Args:
+            entry: (插入时间戳, 数据) 元组
+
+        Returns:
+            是否有效
+        """
+        # monotonic在Linux上走VDSO，无系统调用开销，且不受系统时钟回拨影响
+        return time.monotonic() - entry[0] < self.expire_seconds
+
+    def get(self, url: str, name_hint: Optional[str] = None) -> Optional[Any]:
         """
-        从缓存获取数据
+        从缓存获取数据，精确URL未命中时回退到名称索引
 
         Args:
             url: 目标URL
+            name_hint: 可选的宝可梦名称提示，用于第二层索引查找
 
         Returns:
             缓存的数据或None
         """
-        self.stats["total_requests"] += 1
-
         cache_key = self._generate_cache_key(url)
-
-        # 检查缓存是否存在且有效
-        if cache_key in self.cache_data and self._is_cache_valid(cache_key):
-            self.stats["hits"] += 1
+        entry = self.cache_data.get(cache_key)
+
+        # 精确URL未命中时，尝试名称索引（URL变化但内容相同的场景）
+        if entry is None or not self._is_entry_valid(entry):
+            normalized = None
+            if name_hint:
+                normalized = self._normalize_name(name_hint)
+            if not normalized:
+                normalized = self._name_from_url(url)
+            if normalized:
+                indexed_key = self.name_index.get(normalized)
+                if indexed_key is not None:
+                    indexed_entry = self.cache_data.get(indexed_key)
+                    if indexed_entry is not None and self._is_entry_valid(indexed_entry):
+                        cache_key, entry = indexed_key, indexed_entry
+                        logger.info(f"名称索引命中！名称: {normalized}, URL: {url}")
+
+        if entry is not None and self._is_entry_valid(entry):
+            self.hits += 1
             logger.info(f"缓存命中！URL: {url}")
 
+            # 命中后移动到LRU末尾（最近使用）
+            self.cache_data.move_to_end(cache_key)
+
             # 每10次命中记录一次统计
-            if self.stats["hits"] % 10 == 0:
+            if self.hits % 10 == 0:
                 self.log_stats()
 
-            return self.cache_data[cache_key]
+            return entry[1]
+
+        # 过期条目顺手删除
+        if entry is not None:
+            del self.cache_data[cache_key]
+
+        # 内存层未命中时回源磁盘层（其他worker或上次进程写入的数据）
+        if self.disk_cache is not None:
+            try:
+                disk_data = self.disk_cache.get(cache_key)
+            except Exception as e:
+                logger.warning(f"磁盘缓存读取失败: {e}")
+                disk_data = None
+            if disk_data is not None:
+                self.hits += 1
+                logger.info(f"磁盘缓存命中！URL: {url}")
+                # 回填内存层，后续访问走纯内存路径
+                self.cache_data[cache_key] = (time.monotonic(), disk_data)
+                while len(self.cache_data) > self.max_size:
+                    self.cache_data.popitem(last=False)
+                return disk_data
 
         # 缓存未命中
-        self.stats["misses"] += 1
+        self.misses += 1
         logger.info(f"缓存未命中，URL: {url}")
 
         # 每10次未命中记录一次统计
-        if self.stats["misses"] % 10 == 0:
+        if self.misses % 10 == 0:
             self.log_stats()
 
         return None
 
-    def set(self, url: str, data: str):
+    def set(self, url: str, data: Any, name_hint: Optional[str] = None):
         """
-        将数据存入缓存
+        将数据存入缓存，同时更新名称索引
 
         Args:
             url: 目标URL
             data: 要缓存的数据
+            name_hint: 可选的宝可梦名称提示，用于第二层索引
         """
         cache_key = self._generate_cache_key(url)
 
-        # 清理缓存
-        self._cleanup_cache()
+        # O(1) LRU：插入后移到末尾，超出容量时从头部弹出最旧条目
+        self.cache_data[cache_key] = (time.monotonic(), data)
+        self.cache_data.move_to_end(cache_key)
+        while len(self.cache_data) > self.max_size:
+            self.cache_data.popitem(last=False)
+
+        # 更新名称索引
+        normalized = self._normalize_name(name_hint) if name_hint else self._name_from_url(url)
+        if normalized:
+            self.name_index[normalized] = cache_key
+
+        # 写穿磁盘层，由diskcache按TTL和size_limit自行淘汰
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(cache_key, data, expire=self.expire_seconds)
+            except Exception as e:
+                logger.warning(f"磁盘缓存写入失败: {e}")
 
-        # 存入缓存
-        self.cache_data[cache_key] = data
         logger.info(f"数据已缓存，URL: {url}")
 
     def is_cached(self, url: str) -> bool:
@@ -169,7 +256,8 @@ class WebCache:
             是否已缓存
         """
         cache_key = self._generate_cache_key(url)
-        return cache_key in self.cache_data and self._is_cache_valid(cache_key)
+        entry = self.cache_data.get(cache_key)
+        return entry is not None and self._is_entry_valid(entry)
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -178,7 +266,7 @@ class WebCache:
         Returns:
             统计信息字典
         """
-        total = self.stats["total_requests"]
+        total = self.hits + self.misses
         if total == 0:
             return {
                 "hits": 0,
@@ -188,10 +276,10 @@ class WebCache:
                 "cache_size": len(self.cache_data)
             }
 
-        hit_rate = self.stats["hits"] / total
+        hit_rate = self.hits / total
         return {
-            "hits": self.stats["hits"],
-            "misses": self.stats["misses"],
+            "hits": self.hits,
+            "misses": self.misses,
             "total_requests": total,
             "hit_rate": round(hit_rate * 100, 2),
             "cache_size": len(self.cache_data)
@@ -202,17 +290,20 @@ class WebCache:
         清空所有缓存
         """
         self.cache_data.clear()
+        self.name_index.clear()
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.clear()
+            except Exception as e:
+                logger.warning(f"磁盘缓存清空失败: {e}")
         logger.info("所有缓存数据已清空")
 
     def reset_stats(self):
         """
         重置缓存统计
         """
-        self.stats = {
-            "hits": 0,
-            "misses": 0,
-            "total_requests": 0
-        }
+        self.hits = 0
+        self.misses = 0
         logger.info("缓存统计已重置")
 
     def print_info(self):
@@ -6,5 +6,6 @@
 
 from .llm_chains import LLMChainManager
 from .pokemon_extractor import PokemonExtractor
+from .pokemon_dom_extractor import extract_pokemon_from_dom, is_supported_url
 
-__all__ = ['LLMChainManager', 'PokemonExtractor']
+__all__ = ['LLMChainManager', 'PokemonExtractor', 'extract_pokemon_from_dom', 'is_supported_url']
@@ -4,9 +4,12 @@ LLM处理链管理类
 提供Map-Reduce链管理、提示词模板和LLM调用封装功能
 """
 
+import asyncio
 import json
 import logging
 import os
+import httpx
+import orjson
 from typing import Dict, Any, List, Optional
 try:
     from langchain.chains.summarize import load_summarize_chain
@@ -19,6 +22,7 @@ except ImportError:
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.documents import Document
+from ..cache import ExtractionCache
 from ....tools.time_out_tool import TimeoutTool, create_timeout_error_response
 
 logger = logging.getLogger(__name__)
@@ -54,14 +58,37 @@ class LLMChainManager:
         self.temperature = temperature
         self.timeout = timeout
 
+        # 共享的HTTP/2客户端：Map阶段并发的N个LLM调用
+        # 复用同一条TLS连接上的多路复用流
+        self._http_client = self._create_http_client()
+
         # 初始化LLM
         self.llm = self._create_llm()
 
         # 初始化超时工具
         self.timeout_tool = TimeoutTool(default_timeout=timeout)
 
+        # 提取结果缓存：相同文档内容跳过整个Map-Reduce链
+        self.extraction_cache = ExtractionCache(max_size=256)
+
         logger.info(f"LLMChainManager初始化完成，模型: {model_name}")
 
+    @staticmethod
+    def _create_http_client() -> httpx.AsyncClient:
+        """
+        创建共享的异步HTTP客户端，尽可能启用HTTP/2
+
+        Returns:
+            httpx.AsyncClient实例
+        """
+        limits = httpx.Limits(max_connections=32)
+        try:
+            return httpx.AsyncClient(http2=True, limits=limits)
+        except ImportError:
+            # 未安装h2扩展时退回HTTP/1.1
+            logger.warning("h2扩展不可用，LLM HTTP客户端退回HTTP/1.1")
+            return httpx.AsyncClient(limits=limits)
+
     def _create_llm(self) -> ChatOpenAI:
         """
         创建LLM实例
@@ -74,9 +101,14 @@ class LLMChainManager:
             model=self.model_name,
             temperature=self.temperature,
             api_key=os.getenv("ROUTER_API_KEY"),
-            timeout=self.timeout
+            timeout=self.timeout,
+            http_async_client=self._http_client
         )
 
+    async def close(self):
+        """关闭共享HTTP客户端"""
+        await self._http_client.aclose()
+
     def create_map_reduce_chain(self,
                               map_prompt_template: str,
                               reduce_prompt_template: str,
@@ -213,6 +245,241 @@ class LLMChainManager:
         最终整合的JSON输出:
         """
 
+    async def arun_chain_with_timeout(self,
+                                      chain,
+                                      documents: List[Document],
+                                      timeout: Optional[int] = None):
+        """
+        异步运行处理链（asyncio原生超时）
+
+        与线程版run_chain_with_timeout不同，超时时直接取消底层的
+        HTTP请求协程，不占用线程池槽位，单个worker可以并发服务
+        大量LLM调用。
+
+        Args:
+            chain: 处理链
+            documents: 文档列表
+            timeout: 超时时间
+
+        Returns:
+            tuple: (success, result, error_message)
+        """
+        actual_timeout = timeout or self.timeout
+
+        try:
+            logger.info(f"开始异步LLM处理，超时时间: {actual_timeout}秒")
+            result = await asyncio.wait_for(chain.ainvoke(documents), timeout=actual_timeout)
+            logger.info("异步LLM处理完成")
+            return True, result, ""
+
+        except asyncio.TimeoutError:
+            logger.error(f"异步LLM处理超时 ({actual_timeout}秒)")
+            timeout_response = create_timeout_error_response(
+                "LLM信息提取",
+                actual_timeout,
+                "大模型处理时间过长，请尝试内容较少的网页或简化查询"
+            )
+            return False, timeout_response, f"LLM处理超时: 超过{actual_timeout}秒"
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"异步LLM处理失败: {error_msg}")
+            error_response = {
+                "success": False,
+                "error": f"LLM处理失败: {error_msg}",
+                "suggestion": "大模型处理异常，请尝试其他网站获取宝可梦信息",
+                "error_type": "llm_processing"
+            }
+            return False, error_response, f"LLM处理错误: {error_msg}"
+
+    async def aextract_pokemon_info(self, documents: List[Document]) -> tuple[bool, Any, str]:
+        """
+        异步提取宝可梦信息
+
+        Args:
+            documents: 文档列表
+
+        Returns:
+            tuple: (success, result, error_message)
+        """
+        try:
+            # 文档内容未变化时直接复用缓存的提取结果
+            combined_text = "\n".join(doc.page_content for doc in documents)
+            cached_result = self.extraction_cache.get("", combined_text)
+            if cached_result is not None:
+                logger.info("提取结果缓存命中，跳过Map-Reduce链")
+                return True, cached_result, ""
+
+            # 优先走快速路径：关键段落 + 单次异步LLM调用
+            focused_text = self._slice_relevant_sections(combined_text)
+            if focused_text:
+                try:
+                    prompt = PromptTemplate.from_template(self.get_pokemon_single_shot_prompt())
+                    response = await asyncio.wait_for(
+                        self.llm.ainvoke(prompt.format(text=focused_text)),
+                        timeout=self.timeout
+                    )
+                    content = response.content if hasattr(response, 'content') else str(response)
+                    content = self._strip_code_fences(content)
+                    is_valid, _, _ = self.validate_llm_response(content)
+                    if is_valid:
+                        logger.info("异步快速路径提取成功")
+                        self.extraction_cache.set("", combined_text, content)
+                        return True, content, ""
+                except asyncio.TimeoutError:
+                    logger.warning("异步快速路径超时，回退到Map-Reduce链")
+
+            # 回退到Map-Reduce链
+            chain = self.create_pokemon_extraction_chain()
+            success, result, error_msg = await self.arun_chain_with_timeout(chain, documents)
+
+            if success:
+                logger.info("异步宝可梦信息提取成功")
+                self.extraction_cache.set("", combined_text, result)
+                return True, result, ""
+            return False, result, error_msg
+
+        except Exception as e:
+            error_msg = f"宝可梦信息提取异常: {e}"
+            logger.error(error_msg)
+            error_response = {
+                "success": False,
+                "error": error_msg,
+                "suggestion": "信息提取过程中发生异常，请尝试其他网站",
+                "error_type": "extraction_error"
+            }
+            return False, error_response, error_msg
+
+    # 用于定位宝可梦关键段落的关键词（中英文）
+    SECTION_KEYWORDS = (
+        "种族值", "基础数值", "特性", "属性", "进化",
+        "Base stats", "Abilities", "Type", "Evolution", "Pokédex"
+    )
+
+    def _slice_relevant_sections(self,
+                                 text: str,
+                                 window: int = 1200,
+                                 max_chars: int = 8000) -> str:
+        """
+        从全文中切出宝可梦关键段落
+
+        宝可梦的有效数据通常集中在图鉴信息框/种族值表附近，
+        只取关键词周围的窗口即可覆盖，无需把全文喂给LLM。
+
+        Args:
+            text: 完整文本
+            window: 每个关键词后保留的字符数
+            max_chars: 结果总长度上限
+
+        Returns:
+            拼接后的关键段落文本，未命中任何关键词时返回空串
+        """
+        spans: List[tuple[int, int]] = []
+        for keyword in self.SECTION_KEYWORDS:
+            start = text.find(keyword)
+            while start != -1 and len(spans) < 50:
+                spans.append((max(0, start - 200), min(len(text), start + window)))
+                start = text.find(keyword, start + window)
+
+        if not spans:
+            return ""
+
+        # 合并重叠区间后拼接
+        spans.sort()
+        merged = [spans[0]]
+        for begin, end in spans[1:]:
+            if begin <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((begin, end))
+
+        focused = "\n...\n".join(text[begin:end] for begin, end in merged)
+        return focused[:max_chars]
+
+    @staticmethod
+    def _strip_code_fences(content: str) -> str:
+        """去掉LLM输出中可能的Markdown代码围栏"""
+        content = content.strip()
+        if content.startswith("```"):
+            content = content.strip("`")
+            if content.startswith("json"):
+                content = content[4:]
+            content = content.strip()
+        return content
+
+    def get_pokemon_single_shot_prompt(self) -> str:
+        """
+        获取单次直提的提示词（快速路径）
+
+        Returns:
+            单次提取提示词模板
+        """
+        return """
+        你是一个专业的宝可梦信息提取专家。以下文本已经过滤到宝可梦图鉴的关键段落，
+        请一次性提取全部信息并返回一个JSON对象。
+
+        最终JSON必须包含以下字段：
+        - types: 属性列表
+        - abilities: 特性列表
+        - base_stats: 包含 hp, attack, defense, special_attack, special_defense, speed 的对象
+        - evolution_chain: 进化信息
+        - basic_info: 基本信息（名称、编号、身高、体重等，如果有的话）
+        - game_info: 游戏信息（首次出现世代、版本等，如果有的话）
+
+        缺失的信息使用 "N/A"。请使用英文键名，值可以是中文或英文。
+        只输出JSON本身，不要添加任何额外说明。
+
+        文本内容:
+        ```{text}```
+
+        JSON输出:
+        """
+
+    def extract_pokemon_info_fast(self, documents: List[Document]) -> tuple[bool, Any, str]:
+        """
+        快速路径：关键段落 + 单次LLM调用提取宝可梦信息
+
+        相比Map-Reduce的N+1次LLM调用，这里只调用一次，
+        token消耗和延迟都大幅下降。
+
+        Args:
+            documents: 文档列表
+
+        Returns:
+            tuple: (success, result, error_message)
+        """
+        combined_text = "\n".join(doc.page_content for doc in documents)
+        focused_text = self._slice_relevant_sections(combined_text)
+
+        if not focused_text:
+            return False, None, "未定位到宝可梦关键段落"
+
+        prompt = PromptTemplate.from_template(self.get_pokemon_single_shot_prompt())
+
+        def run_single_shot():
+            return self.llm.invoke(prompt.format(text=focused_text))
+
+        try:
+            logger.info(f"快速路径：单次LLM提取，段落长度: {len(focused_text)}字符")
+            response = self.timeout_tool.run_with_timeout(run_single_shot, timeout=self.timeout)
+            content = response.content if hasattr(response, 'content') else str(response)
+
+            # 去掉可能的Markdown代码围栏
+            content = self._strip_code_fences(content)
+
+            # 验证JSON有效性，无效则交给Map-Reduce回退
+            is_valid, _, error_msg = self.validate_llm_response(content)
+            if not is_valid:
+                return False, None, error_msg
+
+            logger.info("快速路径提取成功")
+            return True, content, ""
+
+        except Exception as e:
+            error_msg = f"快速路径提取失败: {e}"
+            logger.warning(error_msg)
+            return False, None, error_msg
+
     def create_pokemon_extraction_chain(self, verbose: bool = False):
         """
         创建宝可梦信息提取链
@@ -226,7 +493,9 @@ class LLMChainManager:
         map_prompt = self.get_pokemon_map_prompt()
         reduce_prompt = self.get_pokemon_reduce_prompt()
 
-        return self.create_map_reduce_chain(map_prompt, reduce_prompt, verbose)
+        chain = self.create_map_reduce_chain(map_prompt, reduce_prompt, verbose)
+        # 限制Map阶段并发的LLM调用数量，避免对端限流
+        return chain.with_config({"max_concurrency": 8})
 
     def extract_pokemon_info(self, documents: List[Document]) -> tuple[bool, Any, str]:
         """
@@ -239,6 +508,20 @@ class LLMChainManager:
             tuple: (success, result, error_message)
         """
         try:
+            # 文档内容未变化时直接复用缓存的提取结果
+            combined_text = "\n".join(doc.page_content for doc in documents)
+            cached_result = self.extraction_cache.get("", combined_text)
+            if cached_result is not None:
+                logger.info("提取结果缓存命中，跳过Map-Reduce链")
+                return True, cached_result, ""
+
+            # 优先走快速路径：关键段落 + 单次LLM调用
+            fast_success, fast_result, fast_error = self.extract_pokemon_info_fast(documents)
+            if fast_success:
+                self.extraction_cache.set("", combined_text, fast_result)
+                return True, fast_result, ""
+            logger.info(f"快速路径未成功（{fast_error}），回退到Map-Reduce链")
+
             # 创建提取链
             chain = self.create_pokemon_extraction_chain()
 
@@ -247,6 +530,7 @@ class LLMChainManager:
 
             if success:
                 logger.info("宝可梦信息提取成功")
+                self.extraction_cache.set("", combined_text, result)
                 return True, result, ""
             else:
                 return False, result, error_msg
@@ -273,8 +557,8 @@ class LLMChainManager:
             tuple: (is_valid, parsed_data, error_message)
         """
         try:
-            # 尝试解析JSON
-            parsed_data = json.loads(response)
+            # 尝试解析JSON（orjson为SIMD加速的Rust实现，比stdlib快数倍）
+            parsed_data = orjson.loads(response)
 
             # 验证是否为有效的宝可梦数据
             if not isinstance(parsed_data, dict):
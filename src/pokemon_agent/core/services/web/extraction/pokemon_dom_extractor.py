@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+宝可梦DOM快速提取器
+针对已知百科站点（Bulbapedia / 52poke / Serebii）的固定模板直接解析HTML，
+字段齐全时可完全跳过LLM提取，把5-15秒的LLM延迟换成毫秒级的DOM解析。
+解析失败或字段不全时由调用方回退到LLM链路。
+"""
+
+import re
+import logging
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+logger = logging.getLogger(__name__)
+
+# 支持确定性提取的百科域名
+SUPPORTED_DOMAINS = ("bulbapedia.bulbagarden.net", "wiki.52poke.com", "serebii.net")
+
+# 属性页链接模式：Bulbapedia "/wiki/Electric_(type)"、52poke "/wiki/电（属性）"
+_TYPE_HREF_PATTERN = re.compile(
+    r'/wiki/([^/?#]+?)(?:_\(type\)|%EF%BC%88%E5%B1%9E%E6%80%A7%EF%BC%89|（属性）)$'
+)
+
+# 特性页链接模式："/wiki/Static_(Ability)"、"/wiki/静电（特性）"
+_ABILITY_HREF_PATTERN = re.compile(
+    r'/wiki/([^/?#]+?)(?:_\(Ability\)|%EF%BC%88%E7%89%B9%E6%80%A7%EF%BC%89|（特性）)$'
+)
+
+# 种族值标签 -> 标准字段名（兼容中英文模板）
+_STAT_LABELS = {
+    "hp": "hp",
+    "attack": "attack",
+    "攻击": "attack",
+    "defense": "defense",
+    "防御": "defense",
+    "sp. atk": "special_attack",
+    "sp.atk": "special_attack",
+    "特攻": "special_attack",
+    "sp. def": "special_defense",
+    "sp.def": "special_defense",
+    "特防": "special_defense",
+    "speed": "speed",
+    "速度": "speed",
+}
+
+# 页面文本中 "标签: 数值" 形式的种族值，预编译一次供全模块复用
+_STAT_TEXT_PATTERN = re.compile(
+    r'\b(HP|Attack|Defense|Sp\.\s?Atk|Sp\.\s?Def|Speed|攻击|防御|特攻|特防|速度)\s*[:：]?\s*(\d{1,3})\b',
+    re.IGNORECASE
+)
+
+
+def is_supported_url(url: str) -> bool:
+    """
+    判断URL是否属于支持确定性DOM提取的百科域名
+
+    Args:
+        url: 页面URL
+
+    Returns:
+        是否支持
+    """
+    netloc = urlparse(url).netloc.lower()
+    return any(domain in netloc for domain in SUPPORTED_DOMAINS)
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    """保序去重"""
+    seen = set()
+    result = []
+    for item in items:
+        key = item.lower()
+        if key not in seen:
+            seen.add(key)
+            result.append(item)
+    return result
+
+
+def _extract_types(soup: BeautifulSoup) -> List[str]:
+    """从infobox的属性页链接中提取属性列表"""
+    types = []
+    # 限定在第一个infobox表内扫描，避免把"相性"区块的全部属性都收进来
+    infobox = soup.find("table", class_=re.compile(r"roundy|dextable"))
+    scope = infobox if infobox is not None else soup
+    for link in scope.find_all("a", href=True):
+        match = _TYPE_HREF_PATTERN.search(link["href"])
+        if match:
+            label = link.get_text(strip=True) or match.group(1).replace("_", " ")
+            if label:
+                types.append(label)
+    return _dedupe(types)[:2]  # 宝可梦最多双属性
+
+
+def _extract_abilities(soup: BeautifulSoup) -> List[str]:
+    """从特性页链接中提取特性列表"""
+    abilities = []
+    for link in soup.find_all("a", href=True):
+        match = _ABILITY_HREF_PATTERN.search(link["href"])
+        if match:
+            label = link.get_text(strip=True) or match.group(1).replace("_", " ")
+            if label:
+                abilities.append(label)
+    return _dedupe(abilities)[:4]  # 普通特性+隐藏特性
+
+
+def _extract_base_stats(soup: BeautifulSoup) -> Dict[str, str]:
+    """
+    提取六项种族值
+
+    优先扫描表格行（MediaWiki种族值表的 th/td 结构），
+    表格结构不匹配时回退到对页面文本的正则扫描。
+    """
+    stats: Dict[str, str] = {}
+
+    for row in soup.find_all("tr"):
+        cells = row.find_all(["th", "td"])
+        if len(cells) < 2:
+            continue
+        label = cells[0].get_text(strip=True).rstrip(":：").lower()
+        field = _STAT_LABELS.get(label)
+        if not field or field in stats:
+            continue
+        value = cells[1].get_text(strip=True)
+        if value.isdigit() and 1 <= int(value) <= 255:
+            stats[field] = value
+
+    if len(stats) < 6:
+        # 表格结构未命中时扫描纯文本（Serebii等非MediaWiki模板）
+        text = soup.get_text(separator="\n", strip=True)
+        for match in _STAT_TEXT_PATTERN.finditer(text):
+            label = re.sub(r'\s+', '', match.group(1)).lower()
+            field = _STAT_LABELS.get(label) or _STAT_LABELS.get(match.group(1).lower())
+            if field and field not in stats:
+                stats[field] = match.group(2)
+
+    return stats
+
+
+def extract_pokemon_from_dom(html: str, pokemon_name: str) -> Optional[Dict[str, Any]]:
+    """
+    从已知模板的百科页面HTML中确定性提取宝可梦信息
+
+    Args:
+        html: 页面原始HTML
+        pokemon_name: 宝可梦名称
+
+    Returns:
+        字段齐全时返回与LLM提取同构的结果字典，否则返回None（由调用方回退LLM）
+    """
+    try:
+        soup = BeautifulSoup(html, _HTML_PARSER)
+
+        types = _extract_types(soup)
+        abilities = _extract_abilities(soup)
+        base_stats = _extract_base_stats(soup)
+
+        # 核心字段不全时不冒险返回半成品，交给LLM兜底
+        required_stats = ("hp", "attack", "defense", "special_attack", "special_defense", "speed")
+        if not types or not all(stat in base_stats for stat in required_stats):
+            logger.info(f"DOM提取字段不全 (types={len(types)}, stats={len(base_stats)})，回退LLM提取")
+            return None
+
+        logger.info(f"DOM提取成功: {pokemon_name}，跳过LLM调用")
+        return {
+            "basic_info": {
+                "name": pokemon_name,
+                "types": types,
+                "abilities": abilities or ["N/A"],
+            },
+            "battle_stats": {stat: base_stats[stat] for stat in required_stats},
+            "extraction_method": "dom",
+        }
+    except Exception as e:
+        logger.warning(f"DOM提取失败: {e}，回退LLM提取")
+        return None
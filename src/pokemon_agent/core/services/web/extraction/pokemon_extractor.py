@@ -4,13 +4,45 @@
 提供信息提取逻辑、结果验证和格式化输出功能
 """
 
+import copy
 import json
 import logging
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, List, Optional, Tuple
+
+import xxhash
 from langchain_core.documents import Document
 
+try:
+    # orjson是SIMD加速的C解析器，解析LLM返回的几KB JSON比stdlib快2-5倍
+    # orjson.JSONDecodeError继承自json.JSONDecodeError，异常处理无需改动
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    # fastjsonschema把JSON Schema一次性编译成专用Python函数，
+    # 消除每次调用的isinstance树遍历开销
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+try:
+    # 大批量统计时用NumPy的SIMD归约替代纯Python的sum/min/max
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
+# 驻留高频小字符串："N/A"含'/'不会被CPython自动驻留，显式intern后
+# 字典查找和相等比较可走指针同一性短路，批量提取时减少重复分配
+NA = sys.intern("N/A")
+
 
 class PokemonExtractor:
     """
@@ -23,6 +55,13 @@ class PokemonExtractor:
     - 数据质量评估
     """
 
+    # 宝可梦相关的顶层字段（类级常量，避免每次校验时重建列表）
+    _POKEMON_KEYS = ("types", "abilities", "base_stats", "evolution_chain", "basic_info", "game_info")
+
+    # 各区块的标准化字段模板（类级常量，标准化时走字典推导式单次成形）
+    _BASIC_FIELDS = ("name", "national_dex_number", "species", "height", "weight", "color")
+    _GAME_FIELDS = ("generation_introduced", "version_debut", "location_methods")
+
     def __init__(self):
         """
         初始化宝可梦信息提取器
@@ -42,6 +81,38 @@ class PokemonExtractor:
             "hp", "attack", "defense", "special_attack", "special_defense", "speed"
         ]
 
+        # O(1)成员检查与一次性长度计算，避免热路径上重复的列表扫描和len()
+        self._stats_set = frozenset(self.expected_base_stats)
+        self._stats_n = len(self.expected_base_stats)
+        # 标准化时的默认值模板，拷贝展开比逐键分支构建快
+        self._stats_defaults = dict.fromkeys(self.expected_base_stats, NA)
+
+        # 预编译结构校验器（与_validate_structure的手写检查语义一致）
+        self._compiled_validator = None
+        if fastjsonschema is not None:
+            schema = {
+                "type": "object",
+                # 至少包含一个宝可梦相关字段
+                "anyOf": [{"required": [key]} for key in self.expected_structure],
+                "properties": {
+                    "types": {"type": "array"},
+                    "abilities": {"type": "array"},
+                    "base_stats": {
+                        "type": "object",
+                        "required": self.expected_base_stats,
+                    },
+                    "evolution_chain": {"type": "string"},
+                    "basic_info": {"type": "object"},
+                    "game_info": {"type": "object"},
+                },
+            }
+            self._compiled_validator = fastjsonschema.compile(schema)
+
+        # 解析+校验+标准化的结果缓存：重试/重排序实验中相同的LLM输出
+        # 直接复用结果，键为(内容哈希, URL)
+        self._result_cache: "OrderedDict[Tuple[str, str], Tuple[bool, Dict[str, Any], str]]" = OrderedDict()
+        self._result_cache_size = 512
+
         logger.info("PokemonExtractor初始化完成")
 
     def extract_and_validate(self, llm_result: str, url: str) -> Tuple[bool, Dict[str, Any], str]:
@@ -55,9 +126,50 @@ class PokemonExtractor:
         Returns:
             tuple: (success, result, error_message)
         """
+        # 相同的LLM输出（重试、相同页面的重复提取）直接复用缓存结果
+        cache_key = (xxhash.xxh3_64_hexdigest(llm_result.encode()), url)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            self._result_cache.move_to_end(cache_key)
+            success, result, error_msg = cached
+            # 拷贝后返回，避免调用方原地修改污染缓存
+            return success, copy.deepcopy(result), error_msg
+
+        outcome = self._extract_and_validate_uncached(llm_result, url)
+
+        self._result_cache[cache_key] = (outcome[0], copy.deepcopy(outcome[1]), outcome[2])
+        while len(self._result_cache) > self._result_cache_size:
+            self._result_cache.popitem(last=False)
+
+        return outcome
+
+    def _extract_and_validate_uncached(self, llm_result: str, url: str) -> Tuple[bool, Dict[str, Any], str]:
+        """执行实际的解析、校验与标准化流程（无缓存）"""
+        # 先剥掉LLM常见的markdown代码围栏
+        stripped = llm_result.lstrip()
+        if stripped.startswith("```"):
+            stripped = stripped.strip("`").lstrip()
+            if stripped[:4].lower() == "json":
+                stripped = stripped[4:].lstrip()
+
+        # 单字符预检：非JSON对象（对话式开场白等）直接快速失败，
+        # 省去在长字符串上构造JSONDecodeError的定位扫描开销
+        if not stripped or stripped[0] != "{":
+            error_msg = "LLM返回内容不是JSON对象"
+            logger.error(error_msg)
+            error_response = {
+                "success": False,
+                "error": "LLM返回的JSON格式无效",
+                "raw_output": llm_result,
+                "url": url,
+                "suggestion": "大模型返回了非标准格式，请尝试其他网站或重新查询",
+                "error_type": "json_parsing"
+            }
+            return False, error_response, error_msg
+
         try:
             # 解析JSON
-            extracted_data = json.loads(llm_result)
+            extracted_data = _json_loads(stripped)
 
             # 验证数据结构
             is_valid, validation_msg = self._validate_structure(extracted_data)
@@ -82,7 +194,8 @@ class PokemonExtractor:
                 "message": "宝可梦信息提取成功"
             }
 
-            logger.info(f"宝可梦信息提取成功，质量评分: {quality_score:.2f}")
+            # 惰性%s格式化：日志级别高于DEBUG时完全跳过消息构造
+            logger.debug("宝可梦信息提取成功，质量评分: %.2f", quality_score)
             return True, success_response, ""
 
         except json.JSONDecodeError as e:
@@ -123,9 +236,17 @@ class PokemonExtractor:
         if not isinstance(data, dict):
             return False, "数据必须是字典类型"
 
+        # 优先走预编译校验器：单次函数调用完成全部结构检查
+        if self._compiled_validator is not None:
+            try:
+                self._compiled_validator(data)
+                return True, ""
+            except fastjsonschema.JsonSchemaException as e:
+                return False, f"数据结构校验失败: {e}"
+
+        # fastjsonschema不可用时的逐项检查回退路径
         # 检查是否包含宝可梦相关信息
-        pokemon_keys = ["types", "abilities", "base_stats", "evolution_chain", "basic_info", "game_info"]
-        found_keys = [key for key in pokemon_keys if key in data]
+        found_keys = [key for key in self._POKEMON_KEYS if key in data]
 
         if not found_keys:
             return False, "未检测到宝可梦相关信息"
@@ -165,10 +286,25 @@ class PokemonExtractor:
         """
         score = 0.0
         issues = []
-        max_score = 0.0
+        max_score = 100.0
+        # 调用方以0.3（即30分）为丢弃阈值；剩余可得分不足以达标时提前返回
+        pass_threshold = 30.0
+        remaining = max_score
+
+        # 评估战斗数据 (最大30分) —— 区分度最高、检查最便宜，放最前
+        remaining -= 30
+        if "base_stats" in data and data["base_stats"]:
+            stats = data["base_stats"]
+            valid_stats = sum(1 for stat in self.expected_base_stats if stats.get(stat))
+
+            score += (valid_stats / self._stats_n) * 30
+            if valid_stats < self._stats_n:
+                issues.append(f"基础数据不完整 ({valid_stats}/{self._stats_n})")
+        else:
+            issues.append("缺少基础战斗数据")
 
         # 评估基础信息 (最大20分)
-        max_score += 20
+        remaining -= 20
         if "basic_info" in data and data["basic_info"]:
             basic_info = data["basic_info"]
             if isinstance(basic_info, dict):
@@ -194,23 +330,11 @@ class PokemonExtractor:
         else:
             issues.append("缺少基本信息")
 
-        # 评估战斗数据 (最大30分)
-        max_score += 30
-        if "base_stats" in data and data["base_stats"]:
-            stats = data["base_stats"]
-            valid_stats = 0
-            for stat in self.expected_base_stats:
-                if stat in stats and stats[stat]:
-                    valid_stats += 1
-
-            score += (valid_stats / len(self.expected_base_stats)) * 30
-            if valid_stats < len(self.expected_base_stats):
-                issues.append(f"基础数据不完整 ({valid_stats}/{len(self.expected_base_stats)})")
-        else:
-            issues.append("缺少基础战斗数据")
+        if score + remaining < pass_threshold:
+            return score / max_score, issues
 
         # 评估特性信息 (最大15分)
-        max_score += 15
+        remaining -= 15
         if "abilities" in data and data["abilities"]:
             abilities = data["abilities"]
             if isinstance(abilities, list) and len(abilities) > 0:
@@ -220,8 +344,11 @@ class PokemonExtractor:
         else:
             issues.append("缺少特性信息")
 
+        if score + remaining < pass_threshold:
+            return score / max_score, issues
+
         # 评估进化链信息 (最大15分)
-        max_score += 15
+        remaining -= 15
         if "evolution_chain" in data and data["evolution_chain"]:
             evolution_text = data["evolution_chain"]
             if isinstance(evolution_text, str) and len(evolution_text.strip()) > 10:
@@ -231,8 +358,10 @@ class PokemonExtractor:
         else:
             issues.append("缺少进化链信息")
 
-        # 评估游戏信息 (最大20分)
-        max_score += 20
+        if score + remaining < pass_threshold:
+            return score / max_score, issues
+
+        # 评估游戏信息 (最大20分) —— 区分度最弱，放最后
         if "game_info" in data and data["game_info"]:
             game_info = data["game_info"]
             if isinstance(game_info, dict):
@@ -249,9 +378,9 @@ class PokemonExtractor:
             issues.append("缺少游戏信息")
 
         # 计算最终分数
-        final_score = score / max_score if max_score > 0 else 0
+        final_score = score / max_score
 
-        logger.info(f"数据质量评估完成: {final_score:.2f}/{max_score}, 问题: {len(issues)}")
+        logger.debug("数据质量评估完成: %.2f, 问题: %d", final_score, len(issues))
         return final_score, issues
 
     def _standardize_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -270,37 +399,37 @@ class PokemonExtractor:
         if "basic_info" in data:
             standardized["basic_info"] = self._standardize_basic_info(data["basic_info"])
         else:
-            standardized["basic_info"] = {"name": "N/A", "national_dex_number": "N/A"}
+            standardized["basic_info"] = {"name": NA, "national_dex_number": NA}
 
         # 标准化属性信息
         if "types" in data:
             standardized["types"] = self._standardize_types(data["types"])
         else:
-            standardized["types"] = ["N/A"]
+            standardized["types"] = [NA]
 
         # 标准化特性信息
         if "abilities" in data:
             standardized["abilities"] = self._standardize_abilities(data["abilities"])
         else:
-            standardized["abilities"] = ["N/A"]
+            standardized["abilities"] = [NA]
 
         # 标准化基础数据
         if "base_stats" in data:
             standardized["base_stats"] = self._standardize_base_stats(data["base_stats"])
         else:
-            standardized["base_stats"] = {stat: "N/A" for stat in self.expected_base_stats}
+            standardized["base_stats"] = {stat: NA for stat in self.expected_base_stats}
 
         # 标准化进化链
         if "evolution_chain" in data:
-            standardized["evolution_chain"] = str(data["evolution_chain"]) if data["evolution_chain"] else "N/A"
+            standardized["evolution_chain"] = str(data["evolution_chain"]) if data["evolution_chain"] else NA
         else:
-            standardized["evolution_chain"] = "N/A"
+            standardized["evolution_chain"] = NA
 
         # 标准化游戏信息
         if "game_info" in data:
             standardized["game_info"] = self._standardize_game_info(data["game_info"])
         else:
-            standardized["game_info"] = {"generation_introduced": "N/A", "version_debut": "N/A"}
+            standardized["game_info"] = {"generation_introduced": NA, "version_debut": NA}
 
         return standardized
 
@@ -314,15 +443,7 @@ class PokemonExtractor:
         Returns:
             标准化后的基本信息
         """
-        standardized = {
-            "name": str(basic_info.get("name", "N/A")),
-            "national_dex_number": str(basic_info.get("national_dex_number", "N/A")),
-            "species": str(basic_info.get("species", "N/A")),
-            "height": str(basic_info.get("height", "N/A")),
-            "weight": str(basic_info.get("weight", "N/A")),
-            "color": str(basic_info.get("color", "N/A"))
-        }
-        return standardized
+        return {field: str(basic_info.get(field, NA)) for field in self._BASIC_FIELDS}
 
     def _standardize_types(self, types: Any) -> List[str]:
         """
@@ -337,9 +458,9 @@ class PokemonExtractor:
         if isinstance(types, list):
             return [str(t) for t in types if t]
         elif isinstance(types, str):
-            return [types] if types else ["N/A"]
+            return [types] if types else [NA]
         else:
-            return ["N/A"]
+            return [NA]
 
     def _standardize_abilities(self, abilities: Any) -> List[str]:
         """
@@ -354,9 +475,9 @@ class PokemonExtractor:
         if isinstance(abilities, list):
             return [str(a) for a in abilities if a]
         elif isinstance(abilities, str):
-            return [abilities] if abilities else ["N/A"]
+            return [abilities] if abilities else [NA]
         else:
-            return ["N/A"]
+            return [NA]
 
     def _standardize_base_stats(self, base_stats: Dict[str, Any]) -> Dict[str, str]:
         """
@@ -368,13 +489,11 @@ class PokemonExtractor:
         Returns:
             标准化后的基础数据
         """
-        standardized = {}
-        for stat in self.expected_base_stats:
-            if stat in base_stats:
-                standardized[stat] = str(base_stats[stat])
-            else:
-                standardized[stat] = "N/A"
-        return standardized
+        # 默认值模板展开后由实际数据覆盖，单次字典合并替代逐键分支
+        return {
+            **self._stats_defaults,
+            **{k: str(v) for k, v in base_stats.items() if k in self._stats_set},
+        }
 
     def _standardize_game_info(self, game_info: Dict[str, Any]) -> Dict[str, str]:
         """
@@ -386,12 +505,7 @@ class PokemonExtractor:
         Returns:
             标准化后的游戏信息
         """
-        standardized = {
-            "generation_introduced": str(game_info.get("generation_introduced", "N/A")),
-            "version_debut": str(game_info.get("version_debut", "N/A")),
-            "location_methods": str(game_info.get("location_methods", "N/A"))
-        }
-        return standardized
+        return {field: str(game_info.get(field, NA)) for field in self._GAME_FIELDS}
 
     def _create_error_response(self, error: str, suggestion: str, url: str) -> Dict[str, Any]:
         """
@@ -428,34 +542,25 @@ class PokemonExtractor:
         # 基本信息
         if "basic_info" in data:
             basic_info = data["basic_info"]
-            summary["name"] = basic_info.get("name", "N/A")
-            summary["number"] = basic_info.get("national_dex_number", "N/A")
+            summary["name"] = basic_info.get("name", NA)
+            summary["number"] = basic_info.get("national_dex_number", NA)
 
         # 属性
         if "types" in data and data["types"]:
             summary["types"] = data["types"]
 
-        # 总种族值
+        # 总种族值：先过滤后转换，不再需要逐项try/except兜底
         if "base_stats" in data:
             stats = data["base_stats"]
-            total = 0
-            valid_stats = 0
-            for stat, value in stats.items():
-                try:
-                    if isinstance(value, str) and value.isdigit():
-                        total += int(value)
-                        valid_stats += 1
-                    elif isinstance(value, (int, float)):
-                        total += int(value)
-                        valid_stats += 1
-                except (ValueError, TypeError):
-                    pass
-
-            summary["base_stat_total"] = str(total) if valid_stats > 0 else "N/A"
+            nums = [
+                int(value) for value in stats.values()
+                if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit())
+            ]
+            summary["base_stat_total"] = str(sum(nums)) if nums else NA
 
         # 特性数量
         if "abilities" in data and data["abilities"]:
-            summary["ability_count"] = len([a for a in data["abilities"] if a != "N/A"])
+            summary["ability_count"] = len([a for a in data["abilities"] if a != NA])
 
         return summary
 
@@ -472,21 +577,73 @@ class PokemonExtractor:
         if not extraction_results:
             return {}
 
+        # 单次遍历同时统计成功数和质量分，替代原先的三遍列表扫描
         total_extractions = len(extraction_results)
-        successful_extractions = len([r for r in extraction_results if r.get("success", False)])
-
+        successful_extractions = 0
         quality_scores = []
         for result in extraction_results:
-            if result.get("success", False) and "quality_score" in result:
-                quality_scores.append(result["quality_score"])
+            if result.get("success", False):
+                successful_extractions += 1
+                if "quality_score" in result:
+                    quality_scores.append(result["quality_score"])
+
+        if quality_scores and np is not None:
+            # 连续float32缓冲上的SIMD归约，大批量时明显快于纯Python
+            arr = np.asarray(quality_scores, dtype=np.float32)
+            avg_score = float(arr.mean())
+            min_score = float(arr.min())
+            max_score = float(arr.max())
+        elif quality_scores:
+            avg_score = sum(quality_scores) / len(quality_scores)
+            min_score = min(quality_scores)
+            max_score = max(quality_scores)
+        else:
+            avg_score = min_score = max_score = 0
 
         stats = {
             "total_extractions": total_extractions,
             "successful_extractions": successful_extractions,
             "success_rate": (successful_extractions / total_extractions * 100) if total_extractions > 0 else 0,
-            "average_quality_score": sum(quality_scores) / len(quality_scores) if quality_scores else 0,
-            "min_quality_score": min(quality_scores) if quality_scores else 0,
-            "max_quality_score": max(quality_scores) if quality_scores else 0
+            "average_quality_score": avg_score,
+            "min_quality_score": min_score,
+            "max_quality_score": max_score
         }
 
-        return stats
\ No newline at end of file
+        return stats
+
+    @classmethod
+    def extract_batch(cls, items: List[Tuple[str, str]]) -> List[Tuple[bool, Dict[str, Any], str]]:
+        """
+        批量提取并验证宝可梦信息（多进程）
+
+        解析+校验+标准化是无状态的CPU密集操作，批量导入场景下
+        用进程池绕开GIL获得接近核数倍的吞吐。
+
+        Args:
+            items: (llm_result, url) 元组列表
+
+        Returns:
+            与extract_and_validate同构的结果元组列表，顺序与输入一致
+        """
+        if not items:
+            return []
+
+        # 小批量时进程启动开销大于收益，直接串行处理
+        if len(items) < 8:
+            extractor = cls()
+            return [extractor.extract_and_validate(llm_result, url) for llm_result, url in items]
+
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return list(executor.map(_batch_worker, items, chunksize=32))
+
+
+# 每个工作进程只初始化一次提取器，摊薄schema编译等一次性开销
+_worker_extractor: Optional[PokemonExtractor] = None
+
+
+def _batch_worker(pair: Tuple[str, str]) -> Tuple[bool, Dict[str, Any], str]:
+    """进程池工作函数：复用进程内的共享提取器实例"""
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = PokemonExtractor()
+    return _worker_extractor.extract_and_validate(*pair)
\ No newline at end of file
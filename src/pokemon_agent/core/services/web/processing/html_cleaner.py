@@ -4,12 +4,27 @@ HTML清洗器类
 提供HTML标签清洗、内容提取和噪声过滤功能
 """
 
+import io
 import logging
-from typing import List
-from bs4 import BeautifulSoup
+import re
+from collections import Counter
+from typing import BinaryIO, List
+from bs4 import BeautifulSoup, Comment
+
+# lxml的C解析器比纯Python的html.parser快5-20倍，可用时优先选择
+try:
+    from lxml import etree as _lxml_etree
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _lxml_etree = None
+    _HTML_PARSER = "html.parser"
 
 logger = logging.getLogger(__name__)
 
+# 模块加载时预编译：连续空白（含换行）统一折叠为单个空格，
+# 单次扫描即可覆盖原先"先并换行、再并空格"的两遍替换
+_WS_RE = re.compile(r'\s+')
+
 
 class HTMLCleaner:
     """
@@ -46,8 +61,22 @@ class HTMLCleaner:
             'footer-', 'header-', 'navigation-', 'social-'
         ]
 
+        # 主内容容器选择器：MediaWiki正文、语义化article/main标签。
+        # 命中时清洗只作用于正文子树，导航/页脚/侧边栏整体出局，
+        # 产出文本更干净且后续LLM分块数量大幅减少
+        self.main_content_selector = "#mw-content-text, article, main"
+
+        # 预构建复合CSS选择器和前缀元组：清洗时整棵树只遍历一次，
+        # 而不是每个类名/前缀各扫一遍
+        self._remove_class_selector = ",".join(f".{c}" for c in self.remove_classes)
+        self._remove_id_prefix_tuple = tuple(self.remove_id_prefixes)
+
         logger.info("HTMLCleaner初始化完成")
 
+    # 超过该字节数的页面走流式清洗：省下的不是输入字符串本身，
+    # 而是BeautifulSoup整树的Python对象开销（通常是原文的数倍）
+    STREAM_SIZE_THRESHOLD = 1 << 20
+
     def clean_html(self, html_content: str) -> tuple[bool, str, str]:
         """
         清洗HTML内容
@@ -59,10 +88,27 @@ class HTMLCleaner:
             tuple: (success, cleaned_text, error_message)
         """
         try:
-            logger.info("开始HTML清洗处理")
+            logger.debug("开始HTML清洗处理")
+
+            # 超大页面改走lxml流式路径，避免BeautifulSoup整树驻留内存。
+            # 流式路径不做正文容器定位和类/ID过滤（需要完整树才能选择），
+            # 换取峰值内存可控；常规尺寸页面仍走下方精细清洗
+            if (_lxml_etree is not None
+                    and len(html_content) >= self.STREAM_SIZE_THRESHOLD):
+                logger.debug("页面超过%d字节，改用流式清洗", self.STREAM_SIZE_THRESHOLD)
+                return self.clean_html_stream(
+                    io.BytesIO(html_content.encode("utf-8"))
+                )
 
             # 解析HTML
-            soup = BeautifulSoup(html_content, "html.parser")
+            soup = BeautifulSoup(html_content, _HTML_PARSER)
+
+            # 优先定位正文容器：命中且内容充分时，后续清洗与提取
+            # 全部限定在正文子树内（容器内容异常稀少时退回整页）
+            main_node = soup.select_one(self.main_content_selector)
+            if main_node is not None and len(main_node.get_text(strip=True)) >= 200:
+                logger.debug("命中主内容容器，清洗范围限定为正文子树")
+                soup = main_node
 
             # 移除不需要的标签
             self._remove_tags(soup)
@@ -79,7 +125,8 @@ class HTMLCleaner:
             # 清理文本
             cleaned_text = self._clean_text(cleaned_text)
 
-            logger.info(f"HTML清洗完成，提取文本长度: {len(cleaned_text)}字符")
+            # 惰性%s格式化：日志被过滤时不构造消息字符串
+            logger.debug("HTML清洗完成，提取文本长度: %d字符", len(cleaned_text))
             return True, cleaned_text, ""
 
         except Exception as e:
@@ -87,6 +134,59 @@ class HTMLCleaner:
             logger.error(error_msg)
             return False, "", error_msg
 
+    def clean_html_stream(self, fp: BinaryIO,
+                          encoding: str = "utf-8") -> tuple[bool, str, str]:
+        """
+        流式清洗HTML内容
+
+        对多MB的大页面，整串str + 解析树会使峰值内存翻倍。
+        lxml的iterparse边读边建树，噪声子树在解析过程中即被摘除并clear()，
+        峰值内存大致减少被移除子树的体积。lxml不可用时回退到整读路径。
+
+        Args:
+            fp: HTML字节流（文件对象等）
+            encoding: 字节流编码（无charset声明时lxml会猜错CJK页面）
+
+        Returns:
+            tuple: (success, cleaned_text, error_message)
+        """
+        if _lxml_etree is None:
+            # 无lxml时退化为整读清洗
+            return self.clean_html(fp.read().decode(encoding, errors="replace"))
+
+        try:
+            logger.debug("开始流式HTML清洗处理")
+
+            context = _lxml_etree.iterparse(
+                fp, events=("end",), html=True, tag=tuple(self.remove_tags),
+                encoding=encoding,
+            )
+            for _, element in context:
+                parent = element.getparent()
+                if parent is not None:
+                    parent.remove(element)
+                element.clear()
+
+            root = context.root
+            if root is None:
+                return False, "", "HTML流解析失败: 空文档"
+
+            # 逐文本节点以换行拼接，与clean_html的get_text(separator='\n')
+            # 对齐：tostring(method="text")会把相邻块级元素的文本直接连写
+            # （如"PikachuElectric"），丢失词边界
+            text = "\n".join(
+                fragment.strip() for fragment in root.itertext() if fragment.strip()
+            )
+            cleaned_text = self._clean_text(text)
+
+            logger.debug("流式HTML清洗完成，提取文本长度: %d字符", len(cleaned_text))
+            return True, cleaned_text, ""
+
+        except Exception as e:
+            error_msg = f"HTML流解析失败: {str(e)}"
+            logger.error(error_msg)
+            return False, "", error_msg
+
     def _remove_tags(self, soup: BeautifulSoup):
         """
         移除不需要的HTML标签
@@ -94,15 +194,16 @@ class HTMLCleaner:
         Args:
             soup: BeautifulSoup对象
         """
+        # find_all接受标签名列表，一次遍历即可匹配全部待移除标签
+        # extract()是O(1)的父节点摘除；decompose()会递归清空整棵子树，
+        # 对nav/footer等大子树是每节点一次的Python循环，交给GC回收即可
         removed_count = 0
-        for tag_name in self.remove_tags:
-            tags = soup.find_all(tag_name)
-            for tag in tags:
-                tag.decompose()
-                removed_count += 1
+        for tag in soup.find_all(self.remove_tags):
+            tag.extract()
+            removed_count += 1
 
         if removed_count > 0:
-            logger.debug(f"移除了{removed_count}个{', '.join(self.remove_tags)}标签")
+            logger.debug("移除了%d个噪声标签", removed_count)
 
     def _remove_classes_and_ids(self, soup: BeautifulSoup):
         """
@@ -111,17 +212,15 @@ class HTMLCleaner:
         Args:
             soup: BeautifulSoup对象
         """
-        # 移除指定类的元素
-        for class_name in self.remove_classes:
-            elements = soup.find_all(class_=class_name)
-            for element in elements:
-                element.decompose()
-
-        # 移除指定ID前缀的元素
-        for prefix in self.remove_id_prefixes:
-            elements = soup.find_all(id=lambda x: x and x.startswith(prefix))
-            for element in elements:
-                element.decompose()
+        # 复合CSS选择器一次遍历匹配全部待移除类名（soupsieve在C层做属性比较）
+        # 同样用O(1)的extract()摘除，见_remove_tags中的说明
+        for element in soup.select(self._remove_class_selector):
+            element.extract()
+
+        # 单次遍历匹配全部ID前缀：str.startswith接受元组，免去逐前缀的lambda扫描
+        for element in soup.find_all(id=True):
+            if element.get('id', '').startswith(self._remove_id_prefix_tuple):
+                element.extract()
 
     def _remove_comments(self, soup: BeautifulSoup):
         """
@@ -130,7 +229,6 @@ class HTMLCleaner:
         Args:
             soup: BeautifulSoup对象
         """
-        from bs4 import Comment
         comments = soup.find_all(string=lambda text: isinstance(text, Comment))
         for comment in comments:
             comment.extract()
@@ -159,19 +257,9 @@ class HTMLCleaner:
         Returns:
             清理后的文本
         """
-        # 移除多余的空白字符
-        import re
-
-        # 替换多个换行为单个换行
-        text = re.sub(r'\n\s*\n', '\n', text)
-
-        # 替换多个空格为单个空格
-        text = re.sub(r'\s+', ' ', text)
-
-        # 移除行首行尾的空白
-        text = text.strip()
-
-        return text
+        # 连续空白折叠为单个空格并去掉首尾空白：
+        # 原先两遍re.sub中第二遍已覆盖第一遍的换行折叠，合并成一次扫描
+        return _WS_RE.sub(' ', text).strip()
 
     def extract_links(self, html_content: str) -> List[dict]:
         """
@@ -184,7 +272,7 @@ class HTMLCleaner:
             链接列表，每个链接包含href和text
         """
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
+            soup = BeautifulSoup(html_content, _HTML_PARSER)
             links = []
 
             for link in soup.find_all('a', href=True):
@@ -196,11 +284,11 @@ class HTMLCleaner:
                         'text': text
                     })
 
-            logger.info(f"提取了{len(links)}个链接")
+            logger.debug("提取了%d个链接", len(links))
             return links
 
         except Exception as e:
-            logger.error(f"提取链接失败: {e}")
+            logger.error("提取链接失败: %s", e)
             return []
 
     def extract_images(self, html_content: str) -> List[dict]:
@@ -214,7 +302,7 @@ class HTMLCleaner:
             图片列表，每个图片包含src和alt
         """
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
+            soup = BeautifulSoup(html_content, _HTML_PARSER)
             images = []
 
             for img in soup.find_all('img', src=True):
@@ -226,11 +314,11 @@ class HTMLCleaner:
                         'alt': alt
                     })
 
-            logger.info(f"提取了{len(images)}个图片")
+            logger.debug("提取了%d个图片", len(images))
             return images
 
         except Exception as e:
-            logger.error(f"提取图片失败: {e}")
+            logger.error("提取图片失败: %s", e)
             return []
 
     def get_page_structure(self, html_content: str) -> dict:
@@ -244,41 +332,40 @@ class HTMLCleaner:
             页面结构信息
         """
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # 统计标签数量
-            tag_counts = {}
-            for tag in soup.find_all(True):
-                tag_name = tag.name
-                tag_counts[tag_name] = tag_counts.get(tag_name, 0) + 1
-
-            # 获取标题
-            title = soup.title.string if soup.title else ""
+            soup = BeautifulSoup(html_content, _HTML_PARSER)
 
-            # 获取主要标题
+            # 单次descendants遍历同时统计标签数量并收集标题，
+            # 替代原先标签计数+六级标题+表格/列表/表单共十次全树扫描
+            tag_counts: Counter = Counter()
             headings = []
-            for i in range(1, 7):
-                h_tags = soup.find_all(f'h{i}')
-                for h in h_tags:
+            for element in soup.descendants:
+                name = getattr(element, 'name', None)
+                if not name:
+                    continue
+                tag_counts[name] += 1
+                if len(name) == 2 and name[0] == 'h' and name[1] in '123456':
                     headings.append({
-                        'level': i,
-                        'text': h.get_text(strip=True)
+                        'level': int(name[1]),
+                        'text': element.get_text(strip=True)
                     })
 
+            # 获取标题
+            title = soup.title.string if soup.title else ""
+
             structure = {
                 'title': title,
-                'tag_counts': tag_counts,
+                'tag_counts': dict(tag_counts),
                 'headings': headings,
                 'total_tags': sum(tag_counts.values()),
-                'has_tables': len(soup.find_all('table')) > 0,
-                'has_lists': len(soup.find_all(['ul', 'ol'])) > 0,
-                'has_forms': len(soup.find_all('form')) > 0
+                'has_tables': 'table' in tag_counts,
+                'has_lists': 'ul' in tag_counts or 'ol' in tag_counts,
+                'has_forms': 'form' in tag_counts
             }
 
             return structure
 
         except Exception as e:
-            logger.error(f"获取页面结构失败: {e}")
+            logger.error("获取页面结构失败: %s", e)
             return {}
 
     def validate_html_quality(self, html_content: str) -> dict:
@@ -292,13 +379,25 @@ class HTMLCleaner:
             质量评估结果
         """
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
+            soup = BeautifulSoup(html_content, _HTML_PARSER)
+
+            # 单次遍历同时探测标题结构和段落，替代两次独立的全树find_all
+            has_headings = False
+            has_paragraphs = False
+            for element in soup.descendants:
+                name = getattr(element, 'name', None)
+                if name == 'p':
+                    has_paragraphs = True
+                elif name in ('h1', 'h2', 'h3'):
+                    has_headings = True
+                if has_headings and has_paragraphs:
+                    break
 
             # 基本质量指标
             quality_metrics = {
                 'has_title': bool(soup.title and soup.title.string),
-                'has_headings': len(soup.find_all(['h1', 'h2', 'h3'])) > 0,
-                'has_paragraphs': len(soup.find_all('p')) > 0,
+                'has_headings': has_headings,
+                'has_paragraphs': has_paragraphs,
                 'content_length': len(soup.get_text(strip=True)),
                 'structure_score': 0,
                 'recommendations': []
@@ -330,7 +429,7 @@ class HTMLCleaner:
             return quality_metrics
 
         except Exception as e:
-            logger.error(f"HTML质量验证失败: {e}")
+            logger.error("HTML质量验证失败: %s", e)
             return {
                 'has_title': False,
                 'has_headings': False,
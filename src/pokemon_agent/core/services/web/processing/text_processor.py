@@ -4,15 +4,107 @@
 提供文本分块、内容验证和格式化功能
 """
 
+import functools
 import logging
 import re
-from typing import List, Dict, Any, Tuple
+from collections import Counter, OrderedDict
+from itertools import chain
+from typing import List, Dict, Any, Optional, Tuple
+
+import xxhash
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+try:
+    # 文本统计是内存带宽受限的工作负载：把5次独立正则扫描
+    # 合并为对码点数组的单次向量化归约
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=8)
+def _make_splitter(chunk_size: int, chunk_overlap: int,
+                   separators: Tuple[str, ...]) -> RecursiveCharacterTextSplitter:
+    """按参数缓存分块器实例，避免每个URL都重建内部分隔符逻辑"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=list(separators)
+    )
+
+# 模块加载时预编译全部热路径正则，免去每次调用时re内部缓存的哈希查找
+_WS_RE = re.compile(r'\s+')
+
+# 句末标点后补换行的translate映射表：str.translate在C层单次扫描完成
+# 逐字符替换，替代正则捕获组回填的第二遍扫描
+_END_PUNCT_TABLE = {ord(ch): ch + '\n' for ch in '。！？'}
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+_EN_WORD_RE = re.compile(r'[a-zA-Z]{3,}')
+_DIGIT_RE = re.compile(r'[0-9]')
+_SENT_RE = re.compile(r'[。！？.!?]')
+_NON_CONTENT_RE = re.compile(r'[0-9\s\-\_\+\=\*\#\@\$\%\^\&\*\(\)\[\]\{\}\<\>\|\\\/\:\;\"\'\,\.\?\!]')
+# 分词正则：中英文两类字符集互斥、字符类内无回溯，re引擎对其
+# 扫描已近似DFA线性行为；若日后分词规则扩展成多模式/有重叠前缀
+# 的复杂模式集，再考虑换用第三方regex模块或hyperscan等真DFA引擎
+# 做多模式一次扫描
+_CJK_RUN_RE = re.compile(r'[\u4e00-\u9fff]+')
+_WORD_RE = re.compile(r'\S+')
+
+# 停用词表：模块级frozenset，免去每次调用时重建集合
+# 当前规模（约60词）下frozenset的哈希查找已是最优；若日后引入
+# 万级停用词库或多字停用短语，应换成字符trie（如pygtrie.CharTrie）
+# 以获得O(词长)的前缀匹配和更好的缓存局部性；词库若进一步膨胀到
+# 十万级、内存占用成为瓶颈，可在精确集合前加一层布隆过滤器
+# （如pybloomfiltermmap3）做概率性预筛——绝大多数非停用词经
+# 几次比特探测即被排除，仅疑似命中才回落到精确查找
+_STOP_WORDS: frozenset = frozenset({
+    '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这',
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after', 'above', 'below', 'between', 'among', 'this', 'that', 'these', 'those'
+})
+
+# 句末标点的码点表（NumPy单遍统计用）
+_SENT_CODES = None
+_NON_CONTENT_CODES = None
+if np is not None:
+    _SENT_CODES = np.array([ord(c) for c in '\u3002\uff01\uff1f.!?'], dtype=np.uint32)
+    # 非内容字符码点表：数字、标点符号，外加re中\s匹配的全部Unicode空白
+    _NON_CONTENT_CODES = np.array(
+        [ord(c) for c in '0123456789-_+=*#@$%^&()[]{}<>|\\/:;"\',.?!']
+        + list(range(0x09, 0x0E)) + list(range(0x1C, 0x20))
+        + [0x20, 0x85, 0xA0, 0x1680] + list(range(0x2000, 0x200B))
+        + [0x2028, 0x2029, 0x202F, 0x205F, 0x3000],
+        dtype=np.uint32,
+    )
+
+
+def _analyze_counts_np(text: str) -> Optional[Dict[str, int]]:
+    """
+    对码点数组做单次向量化统计
+
+    把中文字符/数字/空格/换行/句末标点五类计数合并在同一个
+    uint32缓冲上完成，替代五次独立的全文本正则扫描。
+
+    Args:
+        text: 要统计的文本
+
+    Returns:
+        计数字典，NumPy不可用时返回None
+    """
+    if np is None:
+        return None
+    arr = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    return {
+        'chinese': int(((arr >= 0x4E00) & (arr <= 0x9FFF)).sum()),
+        'digit': int(((arr >= 0x30) & (arr <= 0x39)).sum()),
+        'space': int((arr == 0x20).sum()),
+        'newline': int((arr == 0x0A).sum()),
+        'sentence': int(np.isin(arr, _SENT_CODES).sum()),
+    }
+
+
 class TextProcessor:
     """
     文本处理器
@@ -37,22 +129,28 @@ class TextProcessor:
 
         # 中文友好的分隔符
         self.separators = ["\n\n", "\n", "。", "！", "？", ".", "!", "?", " ", ""]
+        self._sep_tuple = tuple(self.separators)
 
-        # 初始化文本分块器
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=self.separators
-        )
+        # 初始化文本分块器（同参数实例走模块级缓存复用）
+        self.text_splitter = _make_splitter(chunk_size, chunk_overlap, self._sep_tuple)
+
+        # analyze_text结果缓存：同一长文本（验证、分析、摘要各环节）
+        # 常被重复分析，按内容哈希记忆化；短文本统计开销低于哈希开销，不缓存
+        self._analysis_cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._analysis_cache_max_size = 64
+        self._analysis_cache_min_length = 4096
 
         logger.info(f"TextProcessor初始化完成，块大小: {chunk_size}, 重叠: {chunk_overlap}")
 
-    def split_text(self, text: str) -> List[Document]:
+    def split_text(self, text: str, chunk_size: Optional[int] = None,
+                   chunk_overlap: Optional[int] = None) -> List[Document]:
         """
         分割文本为块
 
         Args:
             text: 要分割的文本
+            chunk_size: 可选的块大小（如optimize_chunk_params的结果），不传则用实例默认值
+            chunk_overlap: 可选的块重叠大小
 
         Returns:
             文档块列表
@@ -60,11 +158,21 @@ class TextProcessor:
         try:
             logger.info(f"开始文本分块，原始长度: {len(text)}字符")
 
+            # 指定了自定义参数时从缓存取对应分块器，否则用实例默认分块器
+            if chunk_size is not None or chunk_overlap is not None:
+                splitter = _make_splitter(
+                    chunk_size or self.chunk_size,
+                    chunk_overlap if chunk_overlap is not None else self.chunk_overlap,
+                    self._sep_tuple
+                )
+            else:
+                splitter = self.text_splitter
+
             # 预处理文本
             cleaned_text = self._preprocess_text(text)
 
             # 分割文本
-            docs = self.text_splitter.create_documents([cleaned_text])
+            docs = splitter.create_documents([cleaned_text])
 
             logger.info(f"文本分块完成，生成{len(docs)}个块")
             return docs
@@ -84,15 +192,11 @@ class TextProcessor:
             预处理后的文本
         """
         # 移除多余的空白字符
-        text = re.sub(r'\s+', ' ', text)
-
-        # 确保中文标点符号后有空格
-        text = re.sub(r'([。！？])', r'\1\n', text)
+        text = _WS_RE.sub(' ', text)
 
+        # 句末标点后补换行：translate表驱动，免去第二遍正则扫描
         # 移除行首行尾的空白
-        text = text.strip()
-
-        return text
+        return text.translate(_END_PUNCT_TABLE).strip()
 
     def validate_content(self, text: str) -> Tuple[bool, str]:
         """
@@ -134,20 +238,32 @@ class TextProcessor:
         if meaningful_chars < 50:
             return False
 
-        # 检查是否包含中文或英文单词
-        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-        english_words = len(re.findall(r'[a-zA-Z]{3,}', text))
-
-        # 如果既有中文又有英文，或者其中一种足够多
-        if chinese_chars > 10 or english_words > 5:
-            return True
-
-        # 检查数字和标点符号的比例
         total_chars = len(text)
         if total_chars == 0:
             return False
 
-        non_content_chars = len(re.findall(r'[0-9\s\-\_\+\=\*\#\@\$\%\^\&\*\(\)\[\]\{\}\<\>\|\\\/\:\;\"\'\,\.\?\!]', text))
+        if np is not None:
+            # 单次码点遍历同时得到中文计数和非内容计数，
+            # 中文足够多时直接短路，连英文词的正则扫描都省掉
+            arr = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+            chinese_chars = int(((arr >= 0x4E00) & (arr <= 0x9FFF)).sum())
+            if chinese_chars > 10:
+                return True
+            if len(_EN_WORD_RE.findall(text)) > 5:
+                return True
+            non_content_chars = int(np.isin(arr, _NON_CONTENT_CODES).sum())
+        else:
+            # 检查是否包含中文或英文单词
+            chinese_chars = len(_CJK_RE.findall(text))
+            english_words = len(_EN_WORD_RE.findall(text))
+
+            # 如果既有中文又有英文，或者其中一种足够多
+            if chinese_chars > 10 or english_words > 5:
+                return True
+
+            # 检查数字和标点符号的比例
+            non_content_chars = len(_NON_CONTENT_RE.findall(text))
+
         content_ratio = (total_chars - non_content_chars) / total_chars
 
         return content_ratio > 0.3
@@ -162,19 +278,45 @@ class TextProcessor:
         Returns:
             文本分析结果
         """
-        analysis = {
-            'total_length': len(text),
-            'char_count': len(text),
-            'char_count_no_spaces': len(text.replace(' ', '')),
-            'line_count': len(text.split('\n')),
-            'word_count': len(text.split()),
-            'chinese_char_count': len(re.findall(r'[\u4e00-\u9fff]', text)),
-            'english_word_count': len(re.findall(r'[a-zA-Z]{3,}', text)),
-            'digit_count': len(re.findall(r'[0-9]', text)),
-            'sentence_count': len(re.findall(r'[。！？.!?]', text)),
-            'paragraph_count': len([p for p in text.split('\n\n') if p.strip()]),
-            'readability_score': 0
-        }
+        # 长文本按内容哈希查缓存：xxh3对数KB文本的哈希开销
+        # 远低于多遍字符统计
+        cache_key = None
+        if len(text) > self._analysis_cache_min_length:
+            cache_key = xxhash.xxh3_64_hexdigest(text.encode('utf-8'))
+            if cache_key in self._analysis_cache:
+                self._analysis_cache.move_to_end(cache_key)
+                return dict(self._analysis_cache[cache_key])
+
+        counts = _analyze_counts_np(text)
+        if counts is not None:
+            # NumPy路径：一次码点遍历覆盖五类计数
+            analysis = {
+                'total_length': len(text),
+                'char_count': len(text),
+                'char_count_no_spaces': len(text) - counts['space'],
+                'line_count': counts['newline'] + 1,
+                'word_count': sum(1 for _ in _WORD_RE.finditer(text)),
+                'chinese_char_count': counts['chinese'],
+                'english_word_count': len(_EN_WORD_RE.findall(text)),
+                'digit_count': counts['digit'],
+                'sentence_count': counts['sentence'],
+                'paragraph_count': len([p for p in text.split('\n\n') if p.strip()]),
+                'readability_score': 0
+            }
+        else:
+            analysis = {
+                'total_length': len(text),
+                'char_count': len(text),
+                'char_count_no_spaces': len(text) - text.count(' '),
+                'line_count': text.count('\n') + 1,
+                'word_count': sum(1 for _ in _WORD_RE.finditer(text)),
+                'chinese_char_count': len(_CJK_RE.findall(text)),
+                'english_word_count': len(_EN_WORD_RE.findall(text)),
+                'digit_count': len(_DIGIT_RE.findall(text)),
+                'sentence_count': len(_SENT_RE.findall(text)),
+                'paragraph_count': len([p for p in text.split('\n\n') if p.strip()]),
+                'readability_score': 0
+            }
 
         # 计算可读性分数（简化版）
         total_words = analysis['word_count']
@@ -184,6 +326,12 @@ class TextProcessor:
             avg_words_per_sentence = total_words / total_sentences
             analysis['readability_score'] = max(0, min(100, 100 - avg_words_per_sentence))
 
+        if cache_key is not None:
+            # 存副本防止调用方原地修改污染缓存；LRU淘汰最久未用条目
+            self._analysis_cache[cache_key] = dict(analysis)
+            if len(self._analysis_cache) > self._analysis_cache_max_size:
+                self._analysis_cache.popitem(last=False)
+
         return analysis
 
     def extract_keywords(self, text: str, max_keywords: int = 20) -> List[str]:
@@ -199,24 +347,20 @@ class TextProcessor:
         """
         try:
             # 简单的关键词提取，基于词频
-            words = re.findall(r'[\u4e00-\u9fff]+|[a-zA-Z]{3,}', text.lower())
-
-            # 过滤停用词
-            stop_words = {
-                '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这',
-                'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after', 'above', 'below', 'between', 'among', 'this', 'that', 'these', 'those'
-            }
-
-            word_freq = {}
-            for word in words:
-                if word not in stop_words and len(word) > 1:
-                    word_freq[word] = word_freq.get(word, 0) + 1
-
-            # 按频率排序并返回前N个
-            sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-            keywords = [word for word, freq in sorted_words[:max_keywords]]
-
-            logger.info(f"提取了{len(keywords)}个关键词")
+            # 中文串不受大小写影响，直接在原文本上匹配；只对匹配出的
+            # 英文词逐个lower()，省去对整篇文本的小写副本
+            chinese_runs = (m.group() for m in _CJK_RUN_RE.finditer(text))
+            english_words = (m.group().lower() for m in _EN_WORD_RE.finditer(text))
+
+            # Counter的计数循环在C层执行；most_common用堆做部分排序，
+            # O(n log k)替代对全部词频的O(n log n)完整排序
+            counts = Counter(
+                word for word in chain(chinese_runs, english_words)
+                if len(word) > 1 and word not in _STOP_WORDS
+            )
+            keywords = [word for word, _ in counts.most_common(max_keywords)]
+
+            logger.debug("提取了%d个关键词", len(keywords))
             return keywords
 
         except Exception as e:
@@ -304,12 +448,21 @@ class TextProcessor:
                 'max_chunk_length': 0
             }
 
-        chunk_lengths = [len(doc.page_content) for doc in docs]
+        # 单次循环同时累计总长/最小/最大，替代中间列表加sum/min/max四次遍历
+        total_length = 0
+        min_length = max_length = len(docs[0].page_content)
+        for doc in docs:
+            length = len(doc.page_content)
+            total_length += length
+            if length < min_length:
+                min_length = length
+            elif length > max_length:
+                max_length = length
 
         return {
             'total_chunks': len(docs),
-            'total_length': sum(chunk_lengths),
-            'avg_chunk_length': sum(chunk_lengths) / len(chunk_lengths),
-            'min_chunk_length': min(chunk_lengths),
-            'max_chunk_length': max(chunk_lengths)
+            'total_length': total_length,
+            'avg_chunk_length': total_length / len(docs),
+            'min_chunk_length': min_length,
+            'max_chunk_length': max_length
         }
\ No newline at end of file
@@ -1,10 +1,21 @@
+import asyncio
+import json
 import os
 import logging
+import threading
 from typing import Dict, Any, List, Optional
 from langchain_core.tools import BaseTool
 from pydantic import Field
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
+try:
+    # orjson的C解析器比标准库json快数倍，解析失败时抛出的
+    # JSONDecodeError是json.JSONDecodeError的子类，异常处理兼容
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 from ..services.mcp_client.pokemon_mcp_tool import PokemonMcpTool
 from .sub_tools.web_search import web_search
 from .sub_tools.web_content_scraper import web_content_scraper
@@ -13,6 +24,126 @@ from .sub_tools.web_content_scraper import web_content_scraper
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 用户查询模板：内容固定，模块加载时构建一次，
+# 每次查询只做一处名字插值而不是重组整段文本
+_USER_QUERY_TEMPLATE = """
+请收集关于"{pokemon_name}"的完整宝可梦信息。
+
+请按照ReAct模式进行：
+1. 首先思考需要什么信息
+2. 选择合适的工具行动
+3. 观察结果并继续
+4. 直到信息充分，然后按照指定JSON格式输出最终答案
+
+记住，只有当所有基本信息、战斗数据、进化链、游戏信息都完整时，才输出最终JSON答案。
+"""
+
+# 模块级解码器：raw_decode可以从任意偏移解析出第一个完整JSON值，
+# 比find('{')/rfind('}')切片更健壮（不会把答案后的无关'}'卷进来）
+_JSON_DECODER = json.JSONDecoder()
+
+
+# LLM客户端缓存：ChatOpenAI实例含HTTP连接池，跨工具实例复用
+# 同一(端点, 模型)的客户端可共享连接并省去重复构建开销。
+# 键中刻意不含api_key，避免缓存键长期持有密钥字符串
+_LLM_CACHE: Dict[tuple, ChatOpenAI] = {}
+
+
+def _get_llm(base_url: str, model: str, temperature: float,
+             timeout: int, max_retries: int) -> ChatOpenAI:
+    """
+    获取缓存的ChatOpenAI客户端（同配置复用同一实例）
+
+    Args:
+        base_url: API端点
+        model: 模型名称
+        temperature: 采样温度
+        timeout: 请求超时
+        max_retries: 最大重试次数
+
+    Returns:
+        ChatOpenAI客户端
+    """
+    key = (base_url, model, temperature, timeout, max_retries)
+    llm = _LLM_CACHE.get(key)
+    if llm is None:
+        llm = ChatOpenAI(
+            base_url=base_url,
+            model=model,
+            temperature=temperature,
+            api_key=os.getenv("ROUTER_API_KEY"),
+            timeout=timeout,
+            max_retries=max_retries
+        )
+        _LLM_CACHE[key] = llm
+    return llm
+
+
+# 常驻后台事件循环：每次同步加载MCP工具时新建/销毁事件循环
+# 的开销（约毫秒级）只需付一次，之后所有协程都投递到同一循环
+_bg_loop: Optional[asyncio.AbstractEventLoop] = None
+_bg_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    获取常驻后台事件循环（懒加载单例）
+
+    首次调用时在daemon线程里启动一个run_forever的事件循环，
+    后续协程通过run_coroutine_threadsafe投递执行。
+
+    Returns:
+        后台事件循环
+    """
+    global _bg_loop
+    with _bg_loop_lock:
+        if _bg_loop is None or _bg_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="pokemon-react-bg-loop", daemon=True
+            )
+            thread.start()
+            _bg_loop = loop
+    return _bg_loop
+
+
+def _extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    从文本中提取第一个完整的JSON对象
+
+    依次尝试每个'{'位置做raw_decode，跳过伪起点（如提示语中的
+    花括号），解析成功即返回，整体只对文本做单向扫描。
+
+    Args:
+        text: 可能内嵌JSON的文本
+
+    Returns:
+        解析出的字典，找不到完整JSON对象时返回None
+    """
+    # 快路径：消息本身（或去掉```json围栏后）就是一个完整JSON对象时
+    # 直接走orjson的C解析器，跳过逐起点扫描
+    stripped = text.strip()
+    if stripped.startswith("```"):
+        stripped = stripped.strip("`").removeprefix("json").strip()
+    if stripped.startswith('{') and stripped.endswith('}'):
+        try:
+            obj = _json_loads(stripped)
+            if isinstance(obj, dict):
+                return obj
+        except ValueError:
+            pass
+
+    start = text.find('{')
+    while start != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except ValueError:
+            pass
+        start = text.find('{', start + 1)
+    return None
+
 
 # =========================
 # 主ReAct宝可梦工具
@@ -28,6 +159,9 @@ class PokemonReactTool(BaseTool):
     mcp_tools: Optional[List[Any]] = Field(default=None, exclude=True)
     manual_tools: Optional[List[Any]] = Field(default=None, exclude=True)
     llm: Optional[Any] = Field(default=None, exclude=True)
+    system_prompt: Optional[Any] = Field(default=None, exclude=True)
+    agent_executor: Optional[Any] = Field(default=None, exclude=True)
+    executor_tool_ids: Optional[tuple] = Field(default=None, exclude=True)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -42,12 +176,11 @@ class PokemonReactTool(BaseTool):
         # 初始化所有工具为空列表，将在需要时动态加载
         self.all_sub_tools = self.manual_tools.copy()
 
-        # 初始化LLM
-        self.llm = ChatOpenAI(
+        # 初始化LLM（同配置的客户端实例走模块级缓存复用）
+        self.llm = _get_llm(
             base_url="https://openrouter.ai/api/v1",
             model="x-ai/grok-4-fast:free",
             temperature=0.2,  # 稍微增加创造性，有利于ReAct思考
-            api_key=os.getenv("ROUTER_API_KEY"),
             timeout=45,
             max_retries=2
         )
@@ -71,27 +204,18 @@ class PokemonReactTool(BaseTool):
         """确保工具已加载（同步包装器）"""
         if not self.mcp_tools:
             try:
-                # 检查是否已经有事件循环在运行
-                import asyncio
-                try:
-                    loop = asyncio.get_running_loop()
-                    # 如果有循环在运行，不能嵌套，直接使用手动工具
-                    logger.warning("检测到运行中的事件循环，跳过MCP工具加载")
-                    self.all_sub_tools = self.manual_tools.copy()
-                except RuntimeError:
-                    # 没有运行中的循环，可以创建新的
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(self._load_mcp_tools())
-                    loop.close()
+                # 投递到常驻后台循环执行：与调用方线程的事件循环（若有）
+                # 互不嵌套，也免去每次新建/销毁循环的开销
+                future = asyncio.run_coroutine_threadsafe(
+                    self._load_mcp_tools(), _get_background_loop()
+                )
+                future.result(timeout=30)
             except Exception as e:
                 logger.error(f"同步加载MCP工具失败: {e}")
                 self.all_sub_tools = self.manual_tools.copy()
 
-    def _create_system_prompt(self):
-        """创建ReAct代理的系统提示"""
-        from langchain_core.prompts import PromptTemplate
-
+    def _create_system_prompt(self) -> str:
+        """创建ReAct代理的系统提示（按当前工具集填充工具清单）"""
         prompt_text = """你是一个专业的宝可梦信息专家，使用ReAct（推理-行动-观察）模式来收集宝可梦信息。
 
 **你的核心任务**: 收集用户查询宝可梦的完整、准确信息，包括：
@@ -141,12 +265,37 @@ class PokemonReactTool(BaseTool):
 ```
 
 **开始执行**
-
-Question: {input}
-Thought: {agent_scratchpad}
 """
 
-        return PromptTemplate.from_template(prompt_text)
+        tool_lines = "\n".join(
+            f"- {tool.name}: {tool.description}" for tool in self.all_sub_tools
+        )
+        tool_names = ", ".join(tool.name for tool in self.all_sub_tools)
+        return prompt_text.format(tools=tool_lines, tool_names=tool_names)
+
+    def _get_agent_executor(self):
+        """
+        获取ReAct代理执行器（按工具集缓存）
+
+        langgraph的create_react_agent直接返回可invoke的编译图，
+        工具调用循环由图本身驱动。图编译和提示填充在每次查询中
+        是固定开销，只有工具集变化（如MCP工具延迟加载完成）时
+        才需要重建；其余查询直接复用缓存实例。
+        """
+        tool_ids = tuple(id(tool) for tool in self.all_sub_tools)
+        if self.agent_executor is not None and tool_ids == self.executor_tool_ids:
+            return self.agent_executor
+
+        # 系统提示包含工具清单，随工具集一起重建
+        self.system_prompt = self._create_system_prompt()
+
+        self.agent_executor = create_react_agent(
+            self.llm,
+            self.all_sub_tools,
+            prompt=self.system_prompt
+        )
+        self.executor_tool_ids = tool_ids
+        return self.agent_executor
 
     def _run(self, pokemon_name: str) -> Dict[str, Any]:
         """执行ReAct模式的宝可梦信息收集"""
@@ -157,40 +306,17 @@ Thought: {agent_scratchpad}
             self._ensure_tools_loaded()
             logger.info(f"当前可用工具数量: {len(self.all_sub_tools)}")
 
-            # 创建ReAct代理
-            agent = create_react_agent(
-                llm=self.llm,
-                tools=self.all_sub_tools,
-                prompt=self._create_system_prompt()
-            )
-
-            # 构建用户查询
-            user_query = f"""
-请收集关于"{pokemon_name}"的完整宝可梦信息。
-
-请按照ReAct模式进行：
-1. 首先思考需要什么信息
-2. 选择合适的工具行动
-3. 观察结果并继续
-4. 直到信息充分，然后按照指定JSON格式输出最终答案
-
-记住，只有当所有基本信息、战斗数据、进化链、游戏信息都完整时，才输出最终JSON答案。
-"""
+            # 构建用户查询（模块级模板，仅插值宝可梦名）
+            user_query = _USER_QUERY_TEMPLATE.format(pokemon_name=pokemon_name)
 
             logger.info("启动ReAct代理执行...")
-            # 创建Agent Executor，优化迭代控制
-            agent_executor = AgentExecutor(
-                agent=agent,
-                tools=self.all_sub_tools,
-                verbose=False,  # 关闭详细日志以减少干扰
-                handle_parsing_errors=True, # 处理解析错误
-                max_iterations=6,  # 减少迭代次数以避免复杂状态管理
-                early_stopping_method="force",  # 遇到错误时强制停止代理执行
-                return_intermediate_steps=False,  # 不返回中间步骤以减少内存使用
-                max_execution_time=90,  # 减少最大执行时间
-                trim_intermediate_steps=-1  # 修剪中间步骤以避免状态累积
+            # 复用缓存的Agent Executor（工具集变化时自动重建）
+            agent_executor = self._get_agent_executor()
+            # recursion_limit限制图步数：约等于6轮"思考+工具调用"（2N+1）
+            result = agent_executor.invoke(
+                {"messages": [("user", user_query)]},
+                config={"recursion_limit": 13}
             )
-            result = agent_executor.invoke({"input": user_query})
 
             # 处理代理结果
             if isinstance(result, dict):
@@ -207,15 +333,9 @@ Thought: {agent_scratchpad}
 
                 # 检查是否包含JSON格式的最终答案
                 if "{" in final_message and "}" in final_message:
-                    try:
-                        # 尝试提取JSON部分
-                        json_start = final_message.find("{")
-                        json_end = final_message.rfind("}") + 1
-                        json_content = final_message[json_start:json_end]
-
-                        import json
-                        final_answer = json.loads(json_content)
-
+                    # raw_decode逐起点解析，取第一个完整JSON对象
+                    final_answer = _extract_json_object(final_message)
+                    if final_answer is not None:
                         return {
                             "success": True,
                             "pokemon_name": pokemon_name,
@@ -223,13 +343,13 @@ Thought: {agent_scratchpad}
                             "agent_output": final_message,
                             "mode": "react_agent"
                         }
-                    except json.JSONDecodeError as e:
-                        logger.error(f"JSON解析失败: {e}")
-                        return {
-                            "success": False,
-                            "error": f"最终答案JSON格式错误: {str(e)}",
-                            "agent_output": final_message
-                        }
+
+                    logger.error("JSON解析失败: 未找到完整的JSON对象")
+                    return {
+                        "success": False,
+                        "error": "最终答案JSON格式错误: 未找到完整的JSON对象",
+                        "agent_output": final_message
+                    }
                 else:
                     return {
                         "success": False,
@@ -1,7 +1,13 @@
 import os
+import asyncio
+import functools
+import re
+from collections import OrderedDict
 from .time_out_tool import TimeoutHandler, TimeoutError
 import logging
-from typing import Type, Dict, Any, List, Optional
+import aiohttp
+from bs4 import BeautifulSoup
+from typing import Type, Dict, Any, AsyncIterator, List, Optional, TypedDict
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 from langchain_community.tools import TavilySearchResults
@@ -10,88 +16,323 @@ from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
 import json
+import orjson
+import requests
+import tiktoken
+from langgraph.graph import StateGraph, END
 from ..services.mcp_client.pokemon_mcp_tool import PokemonMcpTool
-from langgraph.prebuilt import create_react_agent
+from ..services.web.cache import ExtractionCache
+from ..services.web.extraction.pokemon_dom_extractor import (
+    extract_pokemon_from_dom,
+    is_supported_url,
+)
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 1. 定义工具的输入模型
-class PokemonInput(BaseModel):
-    pokemon_name: str = Field(description="The name of the Pokémon to search for in Chinese or English.")
+# lxml的C解析器比纯Python的html.parser快5-20倍，可用时优先选择
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
 
-# 2. 定义核心工具
-class PokemonInfoTool(BaseTool):
-    name: str = "pokemon_info_tool"
-    description: str = "Searches for comprehensive Pokémon information from authoritative sources and extracts structured data."
-    args_schema: Type[BaseModel] = PokemonInput
+# 权威站点匹配器：单个预编译正则一次扫描替代对每个URL做
+# 5次Python层子串查找（优先级顺序与原domain列表一致）
+_PRIORITY_DOMAINS = (
+    "wiki.52poke.com",
+    "serebii.net",
+    "bulbapedia.bulbagarden.net",
+    "pokemon.com",
+    "pokemon.jp",
+)
+_PRIORITY_RE = re.compile(
+    "|".join(re.escape(domain) for domain in _PRIORITY_DOMAINS)
+)
 
-    # 使用Field定义可选字段，提供默认值
-    search: Optional[TavilySearchResults] = Field(default=None, exclude=True)
-    llm: Optional[ChatOpenAI] = Field(default=None, exclude=True)
-    parser: Optional[JsonOutputParser] = Field(default=None, exclude=True)
-    tools: Optional[List[Any]] = Field(default=None, exclude=True)
+# 模块级共享HTTP会话：每次抓取新建会话要付TCP+TLS握手
+# （对远端wiki约100-300ms），共享连接池让同站点的后续请求
+# 直接复用热连接，并附带DNS缓存
+_SYNC_HTTP = requests.Session()
+_shared_sessions: Dict[Any, aiohttp.ClientSession] = {}
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # 初始化搜索工具
-        logger.info("Initializing TavilySearchResults with max_results=5")
-        self.search = TavilySearchResults(max_results=5)
-        self.tools = PokemonMcpTool.get_available_tools
-        # 初始化LLM（使用GPT-3.5-turbo以提高响应速度）
-        self.llm = ChatOpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            model="x-ai/grok-4-fast:free",
-            # model="gpt-oss-120b",
-            temperature=0,
-            api_key=os.getenv("ROUTER_API_KEY"),
-            timeout=30,  # 添加超时设置
-            max_retries=2  # 添加重试次数限制
+
+def _get_shared_session() -> aiohttp.ClientSession:
+    """获取当前事件循环对应的共享aiohttp会话（懒加载）
+
+    aiohttp会话绑定创建它的事件循环，按循环分别持有一个，
+    循环结束后的陈旧条目在下次访问时被替换。
+    """
+    loop = asyncio.get_running_loop()
+    session = _shared_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=20, limit_per_host=10, ttl_dns_cache=300
+            )
         )
-        # 初始化JSON解析器
-        self.parser = JsonOutputParser()
-        logger.info("PokemonInfoTool initialization completed")
+        # 顺手清掉已关闭循环的陈旧会话，避免字典无限增长。
+        # 宿主循环已死无法await session.close()，退而同步关闭其
+        # connector（私有_close是该场景下唯一的同步释放路径），
+        # 确保socket释放且不触发Unclosed client session告警
+        for stale_loop in [l for l in _shared_sessions if l.is_closed()]:
+            stale = _shared_sessions.pop(stale_loop)
+            if not stale.closed and stale._connector is not None:
+                try:
+                    stale._connector._close()
+                except Exception:
+                    logger.warning("Failed to close connector of a stale shared session")
+        _shared_sessions[loop] = session
+    return session
 
-    def _select_best_url(self, search_results: List[Dict[str, Any]]) -> Optional[str]:
-        """从搜索结果中选择最佳的URL，优先选择权威站点"""
-        logger.info(f"Selecting best URL from {len(search_results)} search results")
-        if not search_results:
-            logger.warning("No search results available for URL selection")
-            return None
 
-        # 定义权威站点的优先级
-        priority_domains = [
-            "wiki.52poke.com",
-            "serebii.net",
-            "bulbapedia.bulbagarden.net",
-            "pokemon.com",
-            "pokemon.jp"
-        ]
+# 条件GET页面缓存：URL -> (ETag, Last-Modified, 正文)。重访站点时带上
+# If-None-Match/If-Modified-Since验证器，页面未变化则服务器只回304
+# （几百字节）而非整页HTML（常见50-300KB），省掉传输和解压
+_PAGE_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_PAGE_CACHE_MAX = 64
 
-        # 首先检查是否有高优先级域名
-        for result in search_results:
-            url = result.get('url', '')
-            logger.debug(f"Checking URL: {url}")
-            for domain in priority_domains:
-                if domain in url:
-                    logger.info(f"Found priority domain URL: {url}")
-                    return url
 
-        # 如果没有找到高优先级域名，返回第一个结果
-        fallback_url = search_results[0].get('url')
-        logger.info(f"No priority domain found, using fallback URL: {fallback_url}")
-        return fallback_url
+def _conditional_headers(url: str) -> Dict[str, str]:
+    """构造条件GET请求头（无缓存验证器时为空）"""
+    headers: Dict[str, str] = {}
+    entry = _PAGE_CACHE.get(url)
+    if entry is not None:
+        etag, last_modified, _ = entry
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    return headers
 
-    def _extract_with_llm(self, html_content: str, pokemon_name: str) -> Dict[str, Any]:
-        """使用LLM从HTML内容中提取宝可梦信息"""
-        logger.info(f"Starting LLM extraction for Pokemon: {pokemon_name}")
-        logger.debug(f"HTML content length: {len(html_content)} characters")
 
-        # 创建专门的提取提示
-        prompt = PromptTemplate(
+def _store_page(url: str, etag: Optional[str], last_modified: Optional[str], text: str) -> None:
+    """记录页面正文与验证器，供下次条件GET复用（LRU淘汰）"""
+    if not (etag or last_modified):
+        return
+    _PAGE_CACHE[url] = (etag, last_modified, text)
+    _PAGE_CACHE.move_to_end(url)
+    while len(_PAGE_CACHE) > _PAGE_CACHE_MAX:
+        _PAGE_CACHE.popitem(last=False)
+
+
+def _sync_fetch_text(url: str, timeout: int = 15) -> str:
+    """同步抓取页面文本，带条件GET（304时复用缓存正文）"""
+    response = _SYNC_HTTP.get(url, timeout=timeout, headers=_conditional_headers(url))
+    if response.status_code == 304:
+        entry = _PAGE_CACHE.get(url)
+        if entry is not None:
+            logger.info(f"Page not modified (304), reusing cached body for: {url}")
+            _PAGE_CACHE.move_to_end(url)
+            return entry[2]
+        # 验证器命中但本地条目已被淘汰，退回普通GET
+        response = _SYNC_HTTP.get(url, timeout=timeout)
+    response.raise_for_status()
+    _store_page(url, response.headers.get("ETag"),
+                response.headers.get("Last-Modified"), response.text)
+    return response.text
+
+
+# 主内容容器选择器：MediaWiki正文、语义化article/main标签。
+# 命中时导航/页脚/侧边栏完全不进入LLM输入，token预算全部留给正文
+_MAIN_CONTENT_SELECTOR = "#mw-content-text, article, main"
+
+
+def _extract_main_text(html: str) -> str:
+    """从HTML中提取正文文本，优先只取主内容容器
+
+    宝可梦百科页面的有效信息集中在正文容器内；整页get_text会把
+    大量导航/推荐链接混入，截断后挤占真正的图鉴数据。
+
+    Args:
+        html: 原始HTML
+
+    Returns:
+        正文文本（主容器未命中时退回全文提取）
+    """
+    soup = BeautifulSoup(html, _HTML_PARSER)
+    main_node = soup.select_one(_MAIN_CONTENT_SELECTOR)
+    if main_node is not None:
+        text = main_node.get_text(separator="\n", strip=True)
+        # 容器命中但内容异常稀少时（如JS渲染页），退回全文
+        if len(text) >= 200:
+            return text
+    return soup.get_text(separator="\n", strip=True)
+
+
+# 懒加载的tiktoken编码器（加载BPE表有一次性开销）
+_TOKEN_ENCODER = None
+
+
+def _get_token_encoder():
+    """获取共享的tiktoken编码器，加载失败时返回None"""
+    global _TOKEN_ENCODER
+    if _TOKEN_ENCODER is None:
+        try:
+            _TOKEN_ENCODER = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # 离线环境下无法下载BPE表时退回字符截断
+            logger.warning(f"Failed to load tiktoken encoder, falling back to char truncation: {e}")
+            _TOKEN_ENCODER = False
+    return _TOKEN_ENCODER or None
+
+
+def _prepare_llm_content(text: str, max_tokens: int = 6000) -> str:
+    """为LLM准备页面内容：去除样板行后按token数截断
+
+    按字符截断时导航/页脚等样板可能吃掉大半预算；按token截断
+    则保证实际送入模型的预算是确定的，token数直接决定LLM延迟和费用。
+    """
+    # 过滤疑似样板的超短行（导航项、按钮文本等）
+    lines = [line for line in text.splitlines() if len(line.strip()) > 2]
+    cleaned = "\n".join(lines)
+
+    encoder = _get_token_encoder()
+    if encoder is None:
+        # 按约4字符/token的经验比例退化为字符截断
+        return cleaned[:max_tokens * 4]
+
+    tokens = encoder.encode(cleaned, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return cleaned
+    return encoder.decode(tokens[:max_tokens])
+
+class ORJSONOutputParser(JsonOutputParser):
+    """基于orjson的JSON输出解析器
+
+    干净的JSON响应直接走orjson（SIMD加速）快路径，
+    带Markdown围栏或不完整的JSON再回退到LangChain的宽松解析。
+    """
+
+    def parse(self, text: str) -> Any:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            return super().parse(text)
+
+
+# 模块级单例工厂：LangChain可能按请求/Agent重建工具实例，
+# Tavily客户端、ChatOpenAI（各自持有httpx连接池）和解析器
+# 的构建成本（几十到上百毫秒）只需付一次
+@functools.lru_cache(maxsize=1)
+def _get_search_client() -> TavilySearchResults:
+    """获取共享的Tavily搜索客户端"""
+    logger.info("Initializing TavilySearchResults with max_results=5")
+    return TavilySearchResults(max_results=5)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_llm_client() -> ChatOpenAI:
+    """获取共享的LLM客户端"""
+    return ChatOpenAI(
+        base_url="https://openrouter.ai/api/v1",
+        model="x-ai/grok-4-fast:free",
+        # model="gpt-oss-120b",
+        temperature=0,
+        api_key=os.getenv("ROUTER_API_KEY"),
+        timeout=30,  # 添加超时设置
+        max_retries=2  # 添加重试次数限制
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_output_parser() -> "ORJSONOutputParser":
+    """获取共享的JSON输出解析器"""
+    return ORJSONOutputParser()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_format_instructions() -> str:
+    """获取缓存的JSON格式说明（每次重新生成要遍历schema）"""
+    return _get_output_parser().get_format_instructions()
+
+
+
+
+# 结构化输出schema：嵌套Pydantic模型直接作为function-calling的
+# 参数schema传给模型，省去提示里冗长的JSON格式说明和输出端的
+# 宽松解析——模型受schema约束，输出必定可直接validate
+class BasicInfo(BaseModel):
+    """宝可梦基础信息"""
+    name: Optional[str] = Field(default=None, description='中英文名称，如 "皮卡丘 Pikachu"')
+    national_dex_number: Optional[str] = Field(default=None, description='全国图鉴编号，如 "025"')
+    types: Optional[List[str]] = Field(default=None, description='属性（中英文），如 ["电 Electric"]')
+    species: Optional[str] = Field(default=None, description='分类，如 "鼠宝可梦 Mouse Pokémon"')
+    height: Optional[str] = Field(default=None, description='身高，如 "0.4米 0.4m"')
+    weight: Optional[str] = Field(default=None, description='体重，如 "6.0公斤 6.0kg"')
+    abilities: Optional[List[str]] = Field(default=None, description='特性（中英文），如 ["静电 Static"]')
+    gender_ratio: Optional[str] = Field(default=None, description='性别比例')
+    catch_rate: Optional[str] = Field(default=None, description='捕获率，如 "190"')
+    base_friendship: Optional[str] = Field(default=None, description='初始友好度，如 "70"')
+    base_experience: Optional[str] = Field(default=None, description='基础经验值，如 "112"')
+
+
+class BattleStats(BaseModel):
+    """宝可梦种族值"""
+    hp: Optional[str] = Field(default=None, description='HP，如 "35 生命值 HP"')
+    attack: Optional[str] = Field(default=None, description='攻击，如 "55 攻击 Attack"')
+    defense: Optional[str] = Field(default=None, description='防御，如 "40 防御 Defense"')
+    special_attack: Optional[str] = Field(default=None, description='特攻，如 "50 特攻 Special Attack"')
+    special_defense: Optional[str] = Field(default=None, description='特防，如 "50 特防 Special Defense"')
+    speed: Optional[str] = Field(default=None, description='速度，如 "90 速度 Speed"')
+    base_stat_total: Optional[str] = Field(default=None, description='种族值总和，如 "320 总和 Total"')
+    effort_values: Optional[str] = Field(default=None, description='努力值收益')
+
+
+class EvolutionChain(BaseModel):
+    """宝可梦进化链"""
+    evolution_stage: Optional[str] = Field(default=None, description='进化阶段，如 "基础形态 Basic Stage"')
+    evolution_methods: Optional[str] = Field(default=None, description='进化方式与条件')
+    previous_form: Optional[str] = Field(default=None, description='前一进化形态，如 "皮丘 Pichu"')
+    next_form: Optional[str] = Field(default=None, description='下一进化形态，如 "雷丘 Raichu"')
+
+
+class GameInfo(BaseModel):
+    """宝可梦游戏信息"""
+    generation_introduced: Optional[str] = Field(default=None, description='初登场世代，如 "第一代 Generation I"')
+    version_debut: Optional[str] = Field(default=None, description='首次登场版本')
+    location_methods: Optional[str] = Field(default=None, description='获取地点/方式')
+
+
+class AdditionalInfo(BaseModel):
+    """宝可梦附加信息"""
+    color: Optional[str] = Field(default=None, description='颜色，如 "黄色 Yellow"')
+    egg_groups: Optional[List[str]] = Field(default=None, description='蛋群（中英文）')
+    egg_cycles: Optional[str] = Field(default=None, description='孵化周期')
+    base_happiness: Optional[str] = Field(default=None, description='初始亲密度')
+    growth_rate: Optional[str] = Field(default=None, description='经验成长速度，如 "中等 Medium"')
+    habitat: Optional[str] = Field(default=None, description='栖息地，如 "森林 Forest Habitat"')
+
+
+class ImageUrls(BaseModel):
+    """宝可梦图片链接"""
+    official_artwork: Optional[str] = Field(default=None, description='官方绘图URL')
+
+
+class PokemonInfo(BaseModel):
+    """宝可梦完整结构化信息（LLM结构化输出的顶层schema）"""
+    basic_info: Optional[BasicInfo] = Field(default=None, description='基础信息')
+    battle_stats: Optional[BattleStats] = Field(default=None, description='种族值')
+    evolution_chain: Optional[EvolutionChain] = Field(default=None, description='进化链')
+    game_info: Optional[GameInfo] = Field(default=None, description='游戏信息')
+    additional_info: Optional[AdditionalInfo] = Field(default=None, description='附加信息')
+    image_urls: Optional[ImageUrls] = Field(default=None, description='图片链接')
+
+
+# 提示模板与处理链的模块级缓存：模板解析和LCEL管道组装都是
+# 每次调用不变的固定开销，构建一次后所有工具实例与调用共享
+@functools.lru_cache(maxsize=1)
+def _get_primary_prompt() -> PromptTemplate:
+    """获取主提取提示模板
+
+    静态指令块（字段说明+format_instructions）固定在前、动态HTML
+    置于末尾：请求间共享的长前缀保持逐字节一致，可命中推理服务商
+    的提示前缀缓存（temperature=0下输出不受影响）。
+    """
+    return PromptTemplate(
             template="""
-            You are a Pokémon information extraction expert. Please carefully analyze the provided HTML content and extract comprehensive information about the Pokémon "{pokemon_name}".
+            You are a Pokémon information extraction expert. Please carefully analyze the provided HTML content and extract comprehensive information about the Pokémon named at the end of this prompt.
 
             Please extract the following information and return it in JSON format with ENGLISH keys and CHINESE/ENGLISH values:
 
@@ -146,37 +387,23 @@ class PokemonInfoTool(BaseTool):
 
             IMPORTANT: Use ENGLISH keys for all JSON fields. Provide values in both Chinese and English when possible, separated by spaces or slashes.
 
-            HTML Content:
-            {html_content}
-
             Please return the extracted information in the following JSON format:
             {format_instructions}
+
+            Pokémon Name: {pokemon_name}
+
+            HTML Content:
+            {html_content}
             """,
             input_variables=["pokemon_name", "html_content"],
-            partial_variables={"format_instructions": self.parser.get_format_instructions()}
+            partial_variables={"format_instructions": _get_format_instructions()}
         )
 
-        # 限制HTML内容长度以避免上下文溢出和减少处理时间
-        truncated_html = html_content[:25000]  # 从25K减少到10K
-        logger.info(f"Truncated HTML content to {len(truncated_html)} characters for faster processing")
 
-        try:
-            logger.info("Creating and invoking primary LLM extraction chain")
-            agent = create_react_agent(model=self.llm, tools=self.tools)
-            chain = prompt | agent | self.parser
-            result = chain.invoke({
-                "pokemon_name": pokemon_name,
-                "html_content": truncated_html
-            })
-            logger.info("Primary LLM extraction completed successfully")
-            return result
-        except Exception as e:
-            logger.warning(f"Primary LLM extraction failed: {str(e)}")
-            # 如果JSON解析失败，尝试重新提取
-            logger.info("Attempting retry extraction with simplified prompt")
-            try:
-                logger.info("Creating retry prompt template")
-                retry_prompt = PromptTemplate(
+@functools.lru_cache(maxsize=1)
+def _get_retry_prompt() -> PromptTemplate:
+    """获取简化的重试提示模板"""
+    return PromptTemplate(
                     template="""
                     Please extract Pokémon information from the HTML and return ONLY valid JSON with ENGLISH keys and CHINESE/ENGLISH values.
                     Focus on: name, types, abilities, base_stats, evolution_chain, image_urls.
@@ -189,9 +416,6 @@ class PokemonInfoTool(BaseTool):
 
                     IMPORTANT: Use ENGLISH keys for all JSON fields. Provide values in both Chinese and English when possible.
 
-                    HTML Content:
-                    {html_content}
-
                     Return JSON format with ENGLISH keys and CHINESE/ENGLISH values:
                     {{
                         "basic_info": {{
@@ -223,14 +447,230 @@ class PokemonInfoTool(BaseTool):
                             "official_artwork": "https://wiki.52poke.com/wiki/File:025Pikachu.png"
                         }}
                     }}
+
+                    HTML Content:
+                    {html_content}
                     """,
                     input_variables=["html_content"]
                 )
 
-                logger.info("Creating and invoking retry LLM extraction chain")
-                retry_truncated_html = truncated_html[:20000]  # 进一步减少重试时的内容长度
+
+@functools.lru_cache(maxsize=1)
+def _get_fallback_prompt() -> PromptTemplate:
+    """获取极简的降级提取提示模板"""
+    return PromptTemplate(
+                template="""
+                Extract basic Pokemon information from HTML content for {pokemon_name}.
+                Return only this JSON structure with ENGLISH keys and CHINESE/ENGLISH values:
+                {{
+                    "name": "皮卡丘 Pikachu",
+                    "types": ["电 Electric", "飞行 Flying"],
+                    "abilities": ["静电 Static", "避雷针 Lightning Rod"],
+                    "basic_stats": {{
+                        "hp": "35 生命值 HP",
+                        "attack": "55 攻击 Attack",
+                        "defense": "40 防御 Defense",
+                        "special_attack": "50 特攻 Special Attack",
+                        "special_defense": "50 特防 Special Defense",
+                        "speed": "90 速度 Speed"
+                    }},
+                    "image_urls": {{
+                        "official_artwork": "https://wiki.52poke.com/wiki/File:025Pikachu.png"
+                    }}
+                }}
+
+                Also extract any image URLs found in the HTML for official artwork, type charts, or other Pokemon-related images.
+                Use ENGLISH keys and provide values in both Chinese and English when possible.
+                Focus on comprehensive bilingual output for better user experience.
+
+                HTML: {html_content}
+                """,
+                input_variables=["pokemon_name", "html_content"]
+            )
+
+@functools.lru_cache(maxsize=1)
+def _get_structured_prompt() -> PromptTemplate:
+    """获取结构化输出的精简提示模板
+
+    字段说明和输出格式全部由PokemonInfo的schema承载，提示本身
+    只需任务描述；静态部分前置以命中提示前缀缓存。
+    """
+    return PromptTemplate(
+        template="""You are a Pokémon information extraction expert. Extract comprehensive information about the Pokémon named below from the HTML content. Use ENGLISH keys and provide values in both Chinese and English when possible. Leave fields null when the information is not present.
+
+Pokémon Name: {pokemon_name}
+
+HTML Content:
+{html_content}""",
+        input_variables=["pokemon_name", "html_content"]
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_structured_chain():
+    """获取结构化提取链（prompt | llm.with_structured_output）
+
+    模型经function-calling受schema约束直接产出PokemonInfo，
+    无需JSON解析器；schema不支持或调用失败时由调用方回退到
+    基于提示的主提取链。
+    """
+    structured_llm = _get_llm_client().with_structured_output(
+        PokemonInfo, method="function_calling"
+    )
+    return _get_structured_prompt() | structured_llm
+
+@functools.lru_cache(maxsize=1)
+def _get_primary_chain():
+    """获取主提取链（prompt | llm | parser）
+
+    提取是单纯的"内容进、JSON出"任务，不需要工具调用；之前经由
+    create_react_agent的ReAct环节会让模型多走2~5轮推理循环
+    （规划/反思各算一次LLM往返），直连LLM把延迟和token费用
+    压回单次补全。
+    """
+    return _get_primary_prompt() | _get_llm_client() | _get_output_parser()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_retry_chain():
+    """获取简化重试链（prompt | llm | parser）"""
+    return _get_retry_prompt() | _get_llm_client() | _get_output_parser()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_fallback_chain():
+    """获取降级提取链（prompt | llm | parser）"""
+    return _get_fallback_prompt() | _get_llm_client() | _get_output_parser()
+
+
+# 1. 定义工具的输入模型
+class PokemonInput(BaseModel):
+    pokemon_name: str = Field(description="The name of the Pokémon to search for in Chinese or English.")
+
+
+class PipelineState(TypedDict, total=False):
+    """检索状态图的共享状态：搜索产出urls，抓取提取产出result"""
+    name: str
+    urls: List[str]
+    result: Dict[str, Any]
+
+# 2. 定义核心工具
+class PokemonInfoTool(BaseTool):
+    name: str = "pokemon_info_tool"
+    description: str = "Searches for comprehensive Pokémon information from authoritative sources and extracts structured data."
+    args_schema: Type[BaseModel] = PokemonInput
+
+    # 使用Field定义可选字段，提供默认值
+    search: Optional[TavilySearchResults] = Field(default=None, exclude=True)
+    llm: Optional[ChatOpenAI] = Field(default=None, exclude=True)
+    parser: Optional[JsonOutputParser] = Field(default=None, exclude=True)
+    tools: Optional[List[Any]] = Field(default=None, exclude=True)
+    fetch_semaphore: Optional[Any] = Field(default=None, exclude=True)
+    extraction_cache: Optional[ExtractionCache] = Field(default=None, exclude=True)
+    # 外部注入的共享HTTP会话（连接池+DNS缓存），None时每次抓取临时建连
+    http_session: Optional[Any] = Field(default=None, exclude=True)
+    # single-flight去重表：进行中的检索按规范化名称共享同一个Future
+    inflight: Optional[Dict[str, Any]] = Field(default=None, exclude=True)
+    # 编译后的检索状态图（懒加载，每实例一次）
+    pipeline: Optional[Any] = Field(default=None, exclude=True)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # 限制并发出站连接数量，避免打满socket
+        self.fetch_semaphore = asyncio.Semaphore(8)
+        # LLM提取结果缓存：页面内容未变化时跳过LLM调用
+        self.extraction_cache = ExtractionCache(max_size=256)
+        self.inflight = {}
+        # 搜索工具/LLM/解析器均为模块级单例，重复构建工具实例零成本
+        self.search = _get_search_client()
+        self.tools = PokemonMcpTool.get_available_tools
+        self.llm = _get_llm_client()
+        self.parser = _get_output_parser()
+        logger.info("PokemonInfoTool initialization completed")
+
+    def _select_best_url(self, search_results: List[Dict[str, Any]]) -> Optional[str]:
+        """从搜索结果中选择最佳的URL，优先选择权威站点"""
+        logger.info(f"Selecting best URL from {len(search_results)} search results")
+        if not search_results:
+            logger.warning("No search results available for URL selection")
+            return None
+
+        # 首先检查是否有高优先级域名（预编译正则单次扫描）
+        for result in search_results:
+            url = result.get('url', '')
+            logger.debug(f"Checking URL: {url}")
+            if _PRIORITY_RE.search(url):
+                logger.info(f"Found priority domain URL: {url}")
+                return url
+
+        # 如果没有找到高优先级域名，返回第一个结果
+        fallback_url = search_results[0].get('url')
+        logger.info(f"No priority domain found, using fallback URL: {fallback_url}")
+        return fallback_url
+
+    def _select_candidate_urls(self, search_results: List[Dict[str, Any]], limit: int = 3) -> List[str]:
+        """从搜索结果中选择候选URL列表，权威站点排在前面"""
+        if not search_results:
+            return []
+
+        priority_urls: List[str] = []
+        other_urls: List[str] = []
+        for result in search_results:
+            url = result.get('url', '')
+            if not url:
+                continue
+            if _PRIORITY_RE.search(url):
+                priority_urls.append(url)
+            else:
+                other_urls.append(url)
+
+        candidates = (priority_urls + other_urls)[:limit]
+        logger.info(f"Selected {len(candidates)} candidate URLs from {len(search_results)} search results")
+        return candidates
+
+    def _build_primary_prompt(self) -> PromptTemplate:
+        """构建主提取提示模板（模块级缓存，同步/异步路径共用）"""
+        return _get_primary_prompt()
+
+    def _build_retry_prompt(self) -> PromptTemplate:
+        """构建简化的重试提示模板（模块级缓存，同步/异步路径共用）"""
+        return _get_retry_prompt()
+
+    def _extract_with_llm(self, html_content: str, pokemon_name: str) -> Dict[str, Any]:
+        """使用LLM从HTML内容中提取宝可梦信息"""
+        logger.info(f"Starting LLM extraction for Pokemon: {pokemon_name}")
+        logger.debug(f"HTML content length: {len(html_content)} characters")
+
+        # 去除样板行并按token预算截断，避免上下文溢出和token浪费
+        truncated_html = _prepare_llm_content(html_content, max_tokens=6000)
+        logger.info(f"Prepared LLM content: {len(truncated_html)} characters after token-based truncation")
+
+        inputs = {"pokemon_name": pokemon_name, "html_content": truncated_html}
+
+        # 优先走结构化输出：schema约束下无解析失败风险
+        try:
+            logger.info("Invoking structured-output extraction chain")
+            structured = _get_structured_chain().invoke(inputs)
+            logger.info("Structured-output extraction completed successfully")
+            return structured.model_dump()
+        except Exception as e:
+            logger.warning(f"Structured-output extraction failed, falling back to prompt chain: {str(e)}")
+
+        try:
+            logger.info("Invoking cached primary LLM extraction chain")
+            chain = _get_primary_chain()
+            result = chain.invoke(inputs)
+            logger.info("Primary LLM extraction completed successfully")
+            return result
+        except Exception as e:
+            logger.warning(f"Primary LLM extraction failed: {str(e)}")
+            # 如果JSON解析失败，尝试重新提取
+            logger.info("Attempting retry extraction with simplified prompt")
+            try:
+                logger.info("Invoking cached retry LLM extraction chain")
+                retry_truncated_html = _prepare_llm_content(truncated_html, max_tokens=4000)  # 重试时进一步压缩token预算
                 logger.debug(f"Retry HTML content length: {len(retry_truncated_html)} characters")
-                retry_chain = retry_prompt | self.llm | self.parser
+                retry_chain = _get_retry_chain()
                 retry_result = retry_chain.invoke({"html_content": retry_truncated_html})
                 logger.info("Retry LLM extraction completed successfully")
                 return retry_result
@@ -242,8 +682,37 @@ class PokemonInfoTool(BaseTool):
                 }
 
     def _run(self, pokemon_name: str) -> Dict[str, Any]:
-        """执行宝可梦信息检索和提取"""
+        """执行宝可梦信息检索和提取
+
+        优先委托给异步流水线（候选URL并发抓取、asyncio原生超时），
+        串行的sum(搜索+抓取+LLM)墙钟时间压向max(各候选抓取)+LLM。
+        仅在当前线程已有运行中的事件循环（无法嵌套asyncio.run）时
+        退回顺序执行路径。
+        """
         logger.info(f"Starting Pokemon info extraction for: {pokemon_name}")
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._arun_in_fresh_loop(pokemon_name))
+        logger.info("Running loop detected, falling back to sequential sync path")
+        return self._run_sequential(pokemon_name)
+
+    async def _arun_in_fresh_loop(self, pokemon_name: str) -> Dict[str, Any]:
+        """在临时事件循环中执行检索，结束前关闭本循环的共享会话
+
+        asyncio.run的循环随调用返回即销毁，若不先close本循环名下的
+        共享会话，其connector会随循环一起被丢弃，每次同步调用都
+        泄漏连接并触发aiohttp的Unclosed client session告警。
+        """
+        try:
+            return await self._arun(pokemon_name)
+        finally:
+            session = _shared_sessions.pop(asyncio.get_running_loop(), None)
+            if session is not None and not session.closed:
+                await session.close()
+
+    def _run_sequential(self, pokemon_name: str) -> Dict[str, Any]:
+        """顺序执行宝可梦信息检索和提取（无事件循环可用时的后备路径）"""
         try:
             # 步骤1: 搜索 (添加超时处理)
             logger.info("Step 1: Starting search phase")
@@ -274,9 +743,25 @@ class PokemonInfoTool(BaseTool):
             try:
                 logger.debug(f"Loading content from URL: {best_url}")
                 with TimeoutHandler(20):  # 20秒网页加载超时
-                    loader = WebBaseLoader(best_url)
-                    docs = loader.load()
-                    html_content = docs[0].page_content
+                    # 已知模板的百科站点先走确定性DOM提取：
+                    # 字段齐全时毫秒级返回，完全跳过后续LLM调用
+                    if is_supported_url(best_url):
+                        raw_html = _sync_fetch_text(best_url, timeout=15)
+                        dom_result = extract_pokemon_from_dom(raw_html, pokemon_name)
+                        if dom_result is not None:
+                            return {
+                                "pokemon_name": pokemon_name,
+                                "source_url": best_url,
+                                "extraction_timestamp": str(json.dumps({"timestamp": "current_time"})),
+                                "data": dom_result
+                            }
+                        # DOM提取不全时复用已抓取的HTML，避免二次请求；
+                        # 只取主内容容器，样板区域不占用LLM token预算
+                        html_content = _extract_main_text(raw_html)
+                    else:
+                        loader = WebBaseLoader(best_url, default_parser=_HTML_PARSER)
+                        docs = loader.load()
+                        html_content = docs[0].page_content
                     logger.info(f"Webpage content loaded, length: {len(html_content)} characters")
 
                     if not html_content or len(html_content.strip()) < 100:
@@ -292,6 +777,18 @@ class PokemonInfoTool(BaseTool):
 
             # 步骤4: 使用LLM提取信息 (添加超时处理)
             logger.info("Step 4: Starting LLM information extraction")
+
+            # 页面内容未变化时直接复用缓存的提取结果，跳过LLM调用
+            cached_info = self.extraction_cache.get(pokemon_name, html_content)
+            if cached_info is not None:
+                logger.info("Using cached extraction result, skipping LLM call")
+                return {
+                    "pokemon_name": pokemon_name,
+                    "source_url": best_url,
+                    "extraction_timestamp": str(json.dumps({"timestamp": "current_time"})),
+                    "data": cached_info
+                }
+
             try:
                 with TimeoutHandler(45):  # 减少到45秒LLM处理超时
                     logger.info("Starting LLM extraction with timeout protection")
@@ -312,6 +809,10 @@ class PokemonInfoTool(BaseTool):
                     logger.error(f"Fallback extraction also failed: {str(fallback_e)}")
                     return {"error": "LLM information extraction timed out after 45 seconds and fallback failed"}
 
+            # 提取成功时写入缓存，供后续相同页面复用
+            if isinstance(extracted_info, dict) and not extracted_info.get("error"):
+                self.extraction_cache.set(pokemon_name, html_content, extracted_info)
+
             # 添加元数据
             logger.info("Compiling final result with metadata")
             result = {
@@ -333,43 +834,12 @@ class PokemonInfoTool(BaseTool):
         logger.info("Starting fallback extraction with simplified approach")
 
         try:
-            # 使用极简的提示模板
-            fallback_prompt = PromptTemplate(
-                template="""
-                Extract basic Pokemon information from HTML content for {pokemon_name}.
-                Return only this JSON structure with ENGLISH keys and CHINESE/ENGLISH values:
-                {{
-                    "name": "皮卡丘 Pikachu",
-                    "types": ["电 Electric", "飞行 Flying"],
-                    "abilities": ["静电 Static", "避雷针 Lightning Rod"],
-                    "basic_stats": {{
-                        "hp": "35 生命值 HP",
-                        "attack": "55 攻击 Attack",
-                        "defense": "40 防御 Defense",
-                        "special_attack": "50 特攻 Special Attack",
-                        "special_defense": "50 特防 Special Defense",
-                        "speed": "90 速度 Speed"
-                    }},
-                    "image_urls": {{
-                        "official_artwork": "https://wiki.52poke.com/wiki/File:025Pikachu.png"
-                    }}
-                }}
-
-                Also extract any image URLs found in the HTML for official artwork, type charts, or other Pokemon-related images.
-                Use ENGLISH keys and provide values in both Chinese and English when possible.
-                Focus on comprehensive bilingual output for better user experience.
-
-                HTML: {html_content}
-                """,
-                input_variables=["pokemon_name", "html_content"]
-            )
-
             # 只使用前3000字符
             minimal_html = html_content[:3000]
             logger.info(f"Using minimal HTML content: {len(minimal_html)} characters")
 
-            # 创建简化链
-            fallback_chain = fallback_prompt | self.llm | self.parser
+            # 复用模块级缓存的简化链
+            fallback_chain = _get_fallback_chain()
 
             logger.info("Invoking fallback extraction chain")
             result = fallback_chain.invoke({
@@ -384,6 +854,348 @@ class PokemonInfoTool(BaseTool):
             logger.error(f"Fallback extraction failed: {str(e)}")
             return {"error": f"Fallback extraction failed: {str(e)}"}
 
-    async def _arun(self, _pokemon_name: str) -> Dict[str, Any]:
-        """异步版本"""
-        raise NotImplementedError("This tool does not support async execution yet.")
\ No newline at end of file
+    async def _aextract_with_llm(self, html_content: str, pokemon_name: str) -> Dict[str, Any]:
+        """异步版本的LLM信息提取，所有LLM调用均使用ainvoke避免阻塞事件循环"""
+        logger.info(f"Starting async LLM extraction for Pokemon: {pokemon_name}")
+
+        # 与同步路径保持一致的token截断策略
+        truncated_html = _prepare_llm_content(html_content, max_tokens=6000)
+        logger.info(f"Prepared LLM content: {len(truncated_html)} characters after token-based truncation")
+
+        inputs = {"pokemon_name": pokemon_name, "html_content": truncated_html}
+
+        # 优先走结构化输出：schema约束下无解析失败风险
+        try:
+            logger.info("Awaiting structured-output extraction chain")
+            structured = await _get_structured_chain().ainvoke(inputs)
+            logger.info("Structured-output extraction completed successfully")
+            return structured.model_dump()
+        except Exception as e:
+            logger.warning(f"Structured-output extraction failed, falling back to prompt chain: {str(e)}")
+
+        try:
+            logger.info("Awaiting cached primary LLM extraction chain")
+            chain = _get_primary_chain()
+            result = await chain.ainvoke(inputs)
+            logger.info("Primary async LLM extraction completed successfully")
+            return result
+        except Exception as e:
+            logger.warning(f"Primary async LLM extraction failed: {str(e)}")
+            logger.info("Attempting async retry extraction with simplified prompt")
+            try:
+                retry_chain = _get_retry_chain()
+                retry_result = await retry_chain.ainvoke(
+                    {"html_content": _prepare_llm_content(truncated_html, max_tokens=4000)}
+                )
+                logger.info("Async retry LLM extraction completed successfully")
+                return retry_result
+            except Exception as retry_e:
+                logger.error(f"Async retry LLM extraction also failed: {str(retry_e)}")
+                return {
+                    "error": f"Failed to extract information: {str(e)}",
+                    "fallback_error": f"Retry also failed: {str(retry_e)}"
+                }
+
+    @staticmethod
+    async def _aget_text(session: aiohttp.ClientSession, url: str,
+                         timeout: aiohttp.ClientTimeout) -> str:
+        """通过给定会话抓取URL的响应文本，带条件GET（304复用缓存正文）"""
+        async with session.get(url, timeout=timeout,
+                               headers=_conditional_headers(url)) as response:
+            if response.status == 304:
+                entry = _PAGE_CACHE.get(url)
+                if entry is not None:
+                    logger.info(f"Page not modified (304), reusing cached body for: {url}")
+                    _PAGE_CACHE.move_to_end(url)
+                    return entry[2]
+            else:
+                response.raise_for_status()
+                text = await response.text()
+                _store_page(url, response.headers.get("ETag"),
+                            response.headers.get("Last-Modified"), text)
+                return text
+        # 304但本地条目已被淘汰：退回不带验证器的普通GET
+        async with session.get(url, timeout=timeout) as response:
+            response.raise_for_status()
+            return await response.text()
+
+    async def _afetch_html(self, url: str) -> str:
+        """使用aiohttp异步抓取网页，返回原始HTML"""
+        logger.info(f"Fetching page content asynchronously from: {url}")
+        timeout = aiohttp.ClientTimeout(total=20)  # 与同步路径相同的20秒网页加载超时
+
+        # 优先使用外部注入的会话，否则走模块级共享连接池
+        # （保持到权威站点的热连接，省去TLS握手）
+        if self.http_session is not None and not self.http_session.closed:
+            session = self.http_session
+        else:
+            session = _get_shared_session()
+        return await self._aget_text(session, url, timeout)
+
+    async def _afetch_page(self, url: str) -> str:
+        """使用aiohttp异步抓取网页并提取正文文本"""
+        html = await self._afetch_html(url)
+        # BeautifulSoup解析是CPU密集操作，放到线程池避免阻塞事件循环；
+        # 只取主内容容器，样板区域不占用LLM token预算
+        return await asyncio.to_thread(_extract_main_text, html)
+
+    async def _fetch_and_extract(self, url: str, pokemon_name: str) -> tuple[str, Dict[str, Any]]:
+        """抓取单个URL并提取信息，返回(url, 提取结果)
+
+        已知模板的百科站点先走确定性DOM提取（与同步路径一致）：
+        字段齐全时毫秒级返回，完全跳过后续LLM调用。
+        """
+        # 信号量限制并发抓取数量
+        async with self.fetch_semaphore:
+            try:
+                raw_html = await self._afetch_html(url)
+            except asyncio.TimeoutError:
+                return url, {"error": "Webpage loading timed out after 20 seconds"}
+            except Exception as e:
+                return url, {"error": f"Failed to load webpage content: {str(e)}"}
+
+        if is_supported_url(url):
+            dom_result = await asyncio.to_thread(extract_pokemon_from_dom, raw_html, pokemon_name)
+            if dom_result is not None:
+                logger.info(f"DOM fast-path extraction succeeded for: {url}")
+                return url, dom_result
+
+        # DOM提取不全或站点未知时退回LLM路径，只取主内容容器
+        html_content = await asyncio.to_thread(_extract_main_text, raw_html)
+
+        if not html_content or len(html_content.strip()) < 100:
+            return url, {"error": "Insufficient content loaded from the webpage"}
+
+        # 页面内容未变化时直接复用缓存的提取结果
+        cached_info = self.extraction_cache.get(pokemon_name, html_content)
+        if cached_info is not None:
+            logger.info("Using cached extraction result, skipping LLM call")
+            return url, cached_info
+
+        try:
+            extracted_info = await asyncio.wait_for(
+                self._aextract_with_llm(html_content, pokemon_name), timeout=45
+            )
+        except asyncio.TimeoutError:
+            return url, {"error": "LLM information extraction timed out after 45 seconds"}
+
+        if isinstance(extracted_info, dict) and not extracted_info.get("error"):
+            self.extraction_cache.set(pokemon_name, html_content, extracted_info)
+
+        return url, extracted_info
+
+    async def astream_info(self, pokemon_name: str) -> AsyncIterator[str]:
+        """流式检索宝可梦信息，逐步产出NDJSON行
+
+        LLM补全通过astream增量解析：JsonOutputParser在流式模式下
+        会随着token到达产出越来越完整的JSON对象，客户端在首个有效
+        字段到达时即可开始渲染，而不必等到最后一个token。
+        """
+        logger.info(f"Starting streaming Pokemon info extraction for: {pokemon_name}")
+
+        def ndjson_line(payload: Dict[str, Any]) -> str:
+            return json.dumps(payload, ensure_ascii=False) + "\n"
+
+        # 步骤1: 搜索
+        search_query = f"{pokemon_name} 宝可梦 图鉴 神奇宝贝百科"
+        try:
+            search_results = await asyncio.wait_for(self.search.ainvoke(search_query), timeout=30)
+        except asyncio.TimeoutError:
+            yield ndjson_line({"error": "Search operation timed out after 30 seconds"})
+            return
+
+        if not search_results:
+            yield ndjson_line({"error": f"No search results found for {pokemon_name}"})
+            return
+
+        # 步骤2+3: 依次尝试候选URL直到拿到足够的内容
+        candidate_urls = self._select_candidate_urls(search_results, limit=3)
+        best_url: Optional[str] = None
+        html_content: Optional[str] = None
+        for url in candidate_urls:
+            try:
+                content = await self._afetch_page(url)
+            except Exception as e:
+                logger.warning(f"Streaming fetch failed for {url}: {str(e)}")
+                continue
+            if content and len(content.strip()) >= 100:
+                best_url, html_content = url, content
+                break
+
+        if html_content is None:
+            yield ndjson_line({"error": "Could not load content from any candidate URL"})
+            return
+
+        # 先产出元数据行，客户端可立即显示来源
+        yield ndjson_line({"pokemon_name": pokemon_name, "source_url": best_url})
+
+        # 页面未变化时直接产出缓存结果
+        cached_info = self.extraction_cache.get(pokemon_name, html_content)
+        if cached_info is not None:
+            yield ndjson_line({"data": cached_info, "done": True})
+            return
+
+        # 步骤4: 流式LLM提取（与主链同一pipeline，astream增量解析）
+        chain = _get_primary_chain()
+        inputs = {"pokemon_name": pokemon_name, "html_content": _prepare_llm_content(html_content, max_tokens=6000)}
+        last_partial: Optional[Dict[str, Any]] = None
+        try:
+            async for partial in chain.astream(inputs):
+                if partial and partial != last_partial:
+                    last_partial = partial
+                    yield ndjson_line({"data": partial})
+        except Exception as e:
+            # 模型不支持流式输出时回退到缓冲模式
+            logger.warning(f"Streaming extraction failed, falling back to buffered mode: {str(e)}")
+            last_partial = await self._aextract_with_llm(html_content, pokemon_name)
+            yield ndjson_line({"data": last_partial})
+
+        if isinstance(last_partial, dict) and last_partial and not last_partial.get("error"):
+            self.extraction_cache.set(pokemon_name, html_content, last_partial)
+        yield ndjson_line({"done": True})
+
+    async def arun_many(self, pokemon_names: List[str]) -> List[Dict[str, Any]]:
+        """并发批量检索多个宝可梦的信息"""
+        logger.info(f"Starting batch extraction for {len(pokemon_names)} Pokemon")
+        return await asyncio.gather(*(self._arun(name) for name in pokemon_names))
+
+    async def _arun(self, pokemon_name: str) -> Dict[str, Any]:
+        """异步执行宝可梦信息检索和提取（含single-flight并发去重）
+
+        同名宝可梦（大小写/首尾空白规范化后）的并发请求只有第一个
+        真正走搜索+抓取+LLM流水线，其余调用者等待同一个Future，
+        避免重复支付搜索配额和LLM费用。
+        """
+        key = pokemon_name.strip().lower()
+        loop = asyncio.get_running_loop()
+        entry = self.inflight.get(key)
+        # Future绑定事件循环，仅在同一循环内合并并发请求
+        if entry is not None and entry[0] is loop:
+            logger.info(f"Joining in-flight extraction for: {pokemon_name}")
+            return await asyncio.shield(entry[1])
+
+        future: asyncio.Future = loop.create_future()
+        self.inflight[key] = (loop, future)
+        try:
+            result = await self._arun_impl(pokemon_name)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # 无等待者时标记异常已消费，避免GC时的未处理异常告警
+                future.exception()
+            raise
+        finally:
+            if self.inflight.get(key, (None, None))[1] is future:
+                del self.inflight[key]
+
+    async def _arun_impl(self, pokemon_name: str) -> Dict[str, Any]:
+        """单次检索流水线：经编译的LangGraph状态图执行搜索→抓取→提取"""
+        logger.info(f"Starting async Pokemon info extraction for: {pokemon_name}")
+        try:
+            final_state = await self._get_pipeline().ainvoke({"name": pokemon_name})
+            result = final_state.get("result")
+            if result is not None:
+                if not result.get("error"):
+                    logger.info(f"Async Pokemon info extraction completed successfully for: {pokemon_name}")
+                return result
+            return {"error": "Pipeline produced no result"}
+        except Exception as e:
+            logger.error(f"Unexpected error during async execution: {str(e)}")
+            return {"error": f"Unexpected error during async execution: {str(e)}"}
+
+    def _get_pipeline(self):
+        """懒加载编译后的检索状态图（每个实例只编译一次）
+
+        搜索、候选选择与抓取提取合并为单个StateGraph调用，回调/
+        追踪等LangChain按invoke计的固定开销整条流水线只付一次。
+        提取级缓存已由ExtractionCache按(名称, 内容哈希)键承担，
+        等价于在提取节点上挂缓存策略，无需重复配置。
+        """
+        if self.pipeline is None:
+            graph = StateGraph(PipelineState)
+            graph.add_node("search", self._node_search)
+            graph.add_node("fetch_extract", self._node_fetch_extract)
+            graph.set_entry_point("search")
+            # 搜索失败（result已写入）时直接结束，否则进入抓取提取
+            graph.add_conditional_edges(
+                "search",
+                lambda state: "fetch_extract" if state.get("urls") else END,
+            )
+            graph.add_edge("fetch_extract", END)
+            self.pipeline = graph.compile()
+        return self.pipeline
+
+    async def _node_search(self, state: PipelineState) -> Dict[str, Any]:
+        """search节点：Tavily搜索并挑选候选URL（权威站点优先）"""
+        pokemon_name = state["name"]
+        logger.info("Step 1: Starting async search phase")
+        search_query = f"{pokemon_name} 宝可梦 图鉴 神奇宝贝百科"
+        try:
+            search_results = await asyncio.wait_for(
+                self.search.ainvoke(search_query), timeout=30
+            )
+            logger.info(f"Async search completed, returned {len(search_results)} results")
+        except asyncio.TimeoutError:
+            logger.error("Search operation timed out after 30 seconds")
+            return {"urls": [], "result": {"error": "Search operation timed out after 30 seconds"}}
+
+        if not search_results:
+            logger.warning(f"No search results found for {pokemon_name}")
+            return {"urls": [], "result": {"error": f"No search results found for {pokemon_name}"}}
+
+        logger.info("Step 2: Selecting candidate URLs from search results")
+        candidate_urls = self._select_candidate_urls(search_results, limit=3)
+        if not candidate_urls:
+            logger.error("Could not find a suitable URL from search results")
+            return {"urls": [], "result": {"error": "Could not find a suitable URL from search results"}}
+
+        return {"urls": candidate_urls}
+
+    async def _node_fetch_extract(self, state: PipelineState) -> Dict[str, Any]:
+        """fetch_extract节点：并发抓取候选URL，取第一个成功的提取结果"""
+        pokemon_name = state["name"]
+        candidate_urls = state["urls"]
+        logger.info(f"Step 3: Fetching and extracting {len(candidate_urls)} candidate URLs concurrently")
+        tasks = [
+            asyncio.create_task(self._fetch_and_extract(url, pokemon_name))
+            for url in candidate_urls
+        ]
+
+        best_url: Optional[str] = None
+        extracted_info: Optional[Dict[str, Any]] = None
+        last_error = "All candidate URLs failed"
+        try:
+            for completed in asyncio.as_completed(tasks):
+                try:
+                    url, info = await completed
+                except Exception as task_e:
+                    last_error = f"Fetch/extract task failed: {str(task_e)}"
+                    logger.warning(last_error)
+                    continue
+
+                if isinstance(info, dict) and not info.get("error"):
+                    best_url, extracted_info = url, info
+                    logger.info(f"First successful extraction from: {url}")
+                    break
+                last_error = info.get("error", "Unknown extraction error")
+                logger.warning(f"Extraction from {url} failed: {last_error}")
+        finally:
+            # 取消尚未完成的"失败者"任务，释放连接
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        if extracted_info is None:
+            logger.error(f"All candidate URLs failed, last error: {last_error}")
+            return {"result": {"error": last_error}}
+
+        # 添加元数据
+        logger.info("Compiling final result with metadata")
+        return {"result": {
+            "pokemon_name": pokemon_name,
+            "source_url": best_url,
+            "extraction_timestamp": str(json.dumps({"timestamp": "current_time"})),  # 简单的时间戳
+            "data": extracted_info
+        }}
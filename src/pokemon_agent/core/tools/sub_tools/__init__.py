@@ -5,9 +5,10 @@
 """
 
 from .web_search import web_search
-from .web_content_scraper import web_content_scraper
+from .web_content_scraper import web_content_scraper, web_content_scraper_batch
 
 __all__ = [
     "web_search",
-    "web_content_scraper"
+    "web_content_scraper",
+    "web_content_scraper_batch"
 ]
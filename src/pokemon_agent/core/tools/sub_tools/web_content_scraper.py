@@ -4,8 +4,12 @@
 从URL加载内容，清洗并提取结构化宝可梦信息
 """
 
-import json
+import asyncio
 import logging
+import threading
+from concurrent.futures import Future
+
+import orjson
 from typing import List, Dict, Any
 
 from langchain_core.tools import tool
@@ -30,29 +34,63 @@ llm_chain_manager = LLMChainManager(
 )
 pokemon_extractor = PokemonExtractor()
 
+# single-flight去重：缓存未命中时同一URL的并发请求只有第一个真正
+# 抓取+LLM提取，其余线程等待同一个Future结果，避免重复付出网络
+# 和LLM成本（Agent并发处理多个用户问题时常会撞到同一权威页面）
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
 
 @tool
 def web_content_scraper(url: str) -> str:
     """
     从URL加载内容，清洗并使用Map-Reduce过程提取结构化宝可梦信息。
-    针对宝可梦数据提取优化，具有超时保护和缓存功能。
+    针对宝可梦数据提取优化，具有超时保护、缓存和并发去重功能。
     返回包含提取信息或错误详情的JSON字符串。
     """
     logger.info(f"开始处理URL: {url}")
 
-    # 检查缓存
+    # 检查缓存（内部统一传递dict，仅在此边界序列化一次）
     cached_result = web_cache.get(url)
     if cached_result is not None:
-        return cached_result
+        return orjson.dumps(cached_result).decode()
+
+    # single-flight：同一URL仅首个调用者执行抓取，其余等待其结果
+    with _inflight_lock:
+        existing = _inflight.get(url)
+        if existing is None:
+            future: Future = Future()
+            _inflight[url] = future
+    if existing is not None:
+        logger.info(f"等待同URL的进行中抓取: {url}")
+        return orjson.dumps(existing.result()).decode()
+
+    try:
+        result = _scrape_url(url)
+        future.set_result(result)
+        return orjson.dumps(result).decode()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            if _inflight.get(url) is future:
+                del _inflight[url]
+
 
+def _scrape_url(url: str) -> Dict[str, Any]:
+    """执行单个URL的加载、清洗、分块和LLM提取（含结果缓存）
+
+    模块内部统一传递dict，序列化推迟到@tool边界一次完成，
+    省去每个分支"dumps进缓存、批量侧再loads回来"的往返。
+    """
     try:
         # 1. 加载网页内容
         success, content, error_msg = web_loader.load_and_validate(url, min_length=200)
         if not success:
             # 缓存错误结果
-            error_json = json.dumps(content, ensure_ascii=False)
-            web_cache.set(url, error_json)
-            return error_json
+            web_cache.set(url, content)
+            return content
 
         docs = content
 
@@ -66,9 +104,8 @@ def web_content_scraper(url: str) -> str:
                 "suggestion": "网页格式异常，请尝试其他网站获取宝可梦信息",
                 "error_type": "html_parsing"
             }
-            error_json = json.dumps(error_response, ensure_ascii=False)
-            web_cache.set(url, error_json)
-            return error_json
+            web_cache.set(url, error_response)
+            return error_response
 
         # 3. 文本分块处理
         split_docs = text_processor.split_text(cleaned_text)
@@ -80,17 +117,15 @@ def web_content_scraper(url: str) -> str:
                 "suggestion": "网页内容处理异常，请尝试其他网站获取宝可梦信息",
                 "error_type": "text_processing"
             }
-            error_json = json.dumps(error_response, ensure_ascii=False)
-            web_cache.set(url, error_json)
-            return error_json
+            web_cache.set(url, error_response)
+            return error_response
 
         # 4. 提取宝可梦信息
         success, result, error_msg = llm_chain_manager.extract_pokemon_info(split_docs)
         if not success:
             # 缓存LLM错误结果
-            error_json = json.dumps(result, ensure_ascii=False)
-            web_cache.set(url, error_json)
-            return error_json
+            web_cache.set(url, result)
+            return result
 
         llm_response = result
 
@@ -98,15 +133,14 @@ def web_content_scraper(url: str) -> str:
         success, final_result, error_msg = pokemon_extractor.extract_and_validate(llm_response, url)
 
         # 缓存最终结果
-        result_json = json.dumps(final_result, ensure_ascii=False)
-        web_cache.set(url, result_json)
+        web_cache.set(url, final_result)
 
         if success:
             logger.info(f"宝可梦信息提取成功，URL: {url}")
         else:
             logger.warning(f"宝可梦信息提取失败，URL: {url}，原因: {error_msg}")
 
-        return result_json
+        return final_result
 
     except Exception as e:
         logger.error(f"网页抓取过程中发生未预期错误: {str(e)}")
@@ -117,9 +151,127 @@ def web_content_scraper(url: str) -> str:
             "suggestion": "网页处理过程中发生异常，请尝试其他网站获取宝可梦信息",
             "error_type": "unexpected"
         }
-        error_json = json.dumps(error_response, ensure_ascii=False)
-        web_cache.set(url, error_json)
-        return error_json
+        web_cache.set(url, error_response)
+        return error_response
+
+
+async def _ascrape_one(url: str, load_result: tuple) -> Dict[str, Any]:
+    """
+    处理单个已加载URL的清洗、分块和LLM提取
+
+    Args:
+        url: 目标URL
+        load_result: WebLoader.aload_many产出的(success, docs, error)元组
+
+    Returns:
+        与_scrape_url相同结构的结果dict
+    """
+    success, content, _ = load_result
+    if not success:
+        web_cache.set(url, content)
+        return content
+
+    docs = content
+    is_valid, validation_error = web_loader.validate_content(docs[0].page_content, min_length=200)
+    if not is_valid:
+        error_response = {
+            "success": False,
+            "error": validation_error,
+            "url": url,
+            "suggestion": "网站内容不充分，请尝试其他网站获取宝可梦信息",
+            "error_type": "insufficient_content"
+        }
+        web_cache.set(url, error_response)
+        return error_response
+
+    # 清洗和分块是CPU密集操作，放到线程避免阻塞事件循环
+    success, cleaned_text, error_msg = await asyncio.to_thread(
+        html_cleaner.clean_html, docs[0].page_content
+    )
+    if not success:
+        error_response = {
+            "success": False,
+            "error": error_msg,
+            "url": url,
+            "suggestion": "网页格式异常，请尝试其他网站获取宝可梦信息",
+            "error_type": "html_parsing"
+        }
+        web_cache.set(url, error_response)
+        return error_response
+
+    split_docs = await asyncio.to_thread(text_processor.split_text, cleaned_text)
+    if not split_docs:
+        error_response = {
+            "success": False,
+            "error": "文本分块失败",
+            "url": url,
+            "suggestion": "网页内容处理异常，请尝试其他网站获取宝可梦信息",
+            "error_type": "text_processing"
+        }
+        web_cache.set(url, error_response)
+        return error_response
+
+    success, result, error_msg = await llm_chain_manager.aextract_pokemon_info(split_docs)
+    if not success:
+        web_cache.set(url, result)
+        return result
+
+    success, final_result, error_msg = pokemon_extractor.extract_and_validate(result, url)
+    web_cache.set(url, final_result)
+
+    if success:
+        logger.info(f"宝可梦信息提取成功，URL: {url}")
+    else:
+        logger.warning(f"宝可梦信息提取失败，URL: {url}，原因: {error_msg}")
+    return final_result
+
+
+@tool
+async def web_content_scraper_batch(urls: List[str], max_concurrency: int = 5) -> str:
+    """
+    批量抓取多个URL并提取结构化宝可梦信息。
+    全部URL在同一HTTP会话内并发加载，LLM提取阶段由信号量限制并发数。
+    返回包含results（按URL的提取结果）和errors（失败明细）的JSON字符串。
+    """
+    logger.info(f"开始批量处理{len(urls)}个URL，最大并发: {max_concurrency}")
+
+    # 去重并优先走缓存，只对未命中的URL发起网络加载
+    unique_urls = list(dict.fromkeys(urls))
+    cached: Dict[str, Dict[str, Any]] = {}
+    uncached: List[str] = []
+    for url in unique_urls:
+        cached_result = web_cache.get(url)
+        if cached_result is not None:
+            cached[url] = cached_result
+        else:
+            uncached.append(url)
+
+    loaded = await web_loader.aload_many(uncached) if uncached else {}
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bound_scrape(url: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await _ascrape_one(url, loaded[url])
+
+    outcomes = await asyncio.gather(
+        *(bound_scrape(url) for url in uncached), return_exceptions=True
+    )
+
+    results: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    outcome_by_url = dict(zip(uncached, outcomes))
+    for url in unique_urls:
+        outcome = cached[url] if url in cached else outcome_by_url.get(url)
+        if isinstance(outcome, BaseException):
+            errors.append({"url": url, "error": f"批量抓取异常: {outcome}"})
+            continue
+        if isinstance(outcome, dict) and outcome.get("success") is False:
+            errors.append({"url": url, "error": outcome.get("error", "未知错误")})
+        else:
+            results.append({"url": url, "result": outcome})
+
+    return orjson.dumps({"results": results, "errors": errors}).decode()
 
 
 # 缓存管理工具函数
@@ -133,4 +285,4 @@ def clear_cache() -> None:
 
 def is_url_cached(url: str) -> bool:
     """检查URL是否已缓存"""
-    return web_cache.is_cached(url)
\ No newline at end of file
+    return web_cache.is_cached(url)
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import signal
 import threading
 import logging
-from typing import Any, Callable, Optional, Dict
+from typing import Any, Awaitable, Callable, Optional, Dict
 from functools import wraps
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 
 logger = logging.getLogger(__name__)
 
@@ -15,18 +16,35 @@ class TimeoutError(Exception):
     pass
 
 
+def _can_use_sigalrm() -> bool:
+    """判断当前线程能否使用SIGALRM（仅主线程可设置信号处理器）
+
+    uvicorn worker、线程池等非主线程中调用signal.signal会抛
+    ValueError；此时降级为不设信号超时，由调用链内层的网络/LLM
+    超时参数兜底，而不是让整个请求崩溃。
+    """
+    return threading.current_thread() is threading.main_thread()
+
+
 # 超时处理器
 class TimeoutHandler:
-    """基础超时处理器（上下文管理器）"""
+    """基础超时处理器（上下文管理器，非主线程中自动降级为无操作）"""
     def __init__(self, seconds):
         self.seconds = seconds
+        self._armed = False
 
     def __enter__(self):
-        signal.signal(signal.SIGALRM, self.raise_timeout)
-        signal.alarm(self.seconds)
+        if _can_use_sigalrm():
+            signal.signal(signal.SIGALRM, self.raise_timeout)
+            signal.alarm(self.seconds)
+            self._armed = True
+        else:
+            logger.debug("非主线程中跳过SIGALRM超时保护，依赖内层超时参数")
 
     def __exit__(self, _type, _value, _traceback):
-        signal.alarm(0)
+        if self._armed:
+            signal.alarm(0)
+            self._armed = False
 
     def raise_timeout(self, _signum, _frame):
         raise TimeoutError(f"Operation timed out after {self.seconds} seconds")
@@ -65,6 +83,12 @@ class TimeoutTool:
         """
         timeout_seconds = timeout or self.default_timeout
 
+        # 非主线程无法设置信号处理器，降级为无操作
+        if not _can_use_sigalrm():
+            logger.debug("非主线程中跳过SIGALRM超时保护，依赖内层超时参数")
+            yield
+            return
+
         # 设置信号处理器
         old_handler = signal.signal(signal.SIGALRM, self.timeout_handler)
         signal.alarm(timeout_seconds)
@@ -126,6 +150,52 @@ class TimeoutTool:
         logger.info(f"函数 {func.__name__} 执行成功")
         return result
 
+    async def arun_with_timeout(self, coro: Awaitable, timeout: Optional[int] = None) -> Any:
+        """
+        在指定时间内等待协程完成，超时则取消并抛出异常
+
+        与线程版run_with_timeout不同：超时时底层协程被真正取消
+        （HTTP请求中断、连接释放），不会留下继续运行的孤儿线程；
+        且不依赖SIGALRM，可在任意线程/uvicorn worker中使用。
+
+        Args:
+            coro: 要等待的协程
+            timeout: 超时时间（秒），如果为None则使用默认值
+
+        Returns:
+            协程执行结果
+
+        Raises:
+            TimeoutError: 当操作超时时
+        """
+        timeout_seconds = timeout or self.default_timeout
+        try:
+            return await asyncio.wait_for(coro, timeout=timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"协程执行超时 ({timeout_seconds}秒)")
+            raise TimeoutError(f"操作超时，超过 {timeout_seconds} 秒限制") from None
+
+    @asynccontextmanager
+    async def atimeout_context(self, timeout: Optional[int] = None):
+        """
+        异步超时上下文管理器（asyncio原生，timeout_context的协程版）
+
+        Args:
+            timeout: 超时时间（秒），如果为None则使用默认值
+
+        Yields:
+            None
+
+        Raises:
+            TimeoutError: 当作用域内操作超时时
+        """
+        timeout_seconds = timeout or self.default_timeout
+        try:
+            async with asyncio.timeout(timeout_seconds):
+                yield
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"操作超时，超过 {timeout_seconds} 秒限制") from None
+
     def timeout_decorator(self, timeout: Optional[int] = None):
         """
         超时装饰器
@@ -174,6 +244,11 @@ def run_with_timeout(func: Callable, *args, timeout: Optional[int] = None, **kwa
     return timeout_tool.run_with_timeout(func, *args, timeout=timeout, **kwargs)
 
 
+async def arun_with_timeout(coro: Awaitable, timeout: Optional[int] = None) -> Any:
+    """便捷函数：在指定时间内等待协程完成"""
+    return await timeout_tool.arun_with_timeout(coro, timeout=timeout)
+
+
 def timeout_decorator(timeout: Optional[int] = None):
     """便捷函数：超时装饰器"""
     return timeout_tool.timeout_decorator(timeout)